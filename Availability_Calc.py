@@ -9,171 +9,305 @@ Created on Fri Oct  9 22:57:47 2020
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 import os
-import sys
+import argparse
 from Met_Data.Read_Met_Data import read_met_data as met
 from SCB_Data.Read_SCB_Data import read_SCB_data as scb
 from INV_Data.Read_Inv_Data import read_inv_data as inv
+from Common.Cache_Data import DataCache
+from Common.Availability_Kernel import availability_kernel, availability_kpis
+from Common.Write_Report import write_report, BACKENDS
+from Common.Outage_Intervals import as_tickets, outage_mask, tickets_from_elements
+from Common.Align_Data import align_frames, complete_mask, report_summary, timeframe_bounds
+from Common.Profile_Run import RunProfiler
+from Common.Plant_Topology import load_topology
 
 
-proj_name, timeframe = sys.argv[1], sys.argv[2]
+def read_project(root_path, timeframe, cache=None, freq=None, dtype='float64', profiler=None, topology_file=None,
+                 verbose=True):
+    '''
+    Parameters
+    ----------
+    root_path : String with the path of the project folder that contains the 'Met_Data', 'SCB_Data' and 'INV_Data'
+                folders
+    timeframe : String name of the timeframe subfolder to be read, e.g. '2020_09'
+    cache : DataCache, optional. The default is None. Cache of the cleaned data of the .csv files
+    freq : String, optional. The default is None. Step of the common time grid; the most common step of the data
+           when None
+    dtype : String, optional. The default is 'float64'. Data type of the measurements
+    profiler : RunProfiler, optional. The default is None. Profiler in which the reading is timed
+    topology_file : String, optional. The default is None, meaning root_path/plant_topology.json when it exists.
+                    Configuration of the topology of the plant; refer to Common/Plant_Topology.py
+    verbose : Boolean, optional. The default is True. Whether to print a warning for each source with timestamps
+              missing, repeated or out of the grid; they are always given in the dataframe 'alignment'
+
+    Returns
+    -------
+    data : Dictionary with the dataframes 'met_data', 'scb_data' and 'inv_data' aligned on the same time grid, the
+           dictionary 'scb_dict' of the groups of string boxes, the dataframe 'alignment' with the timestamps
+           missing, repeated or out of the grid in any source, and the PlantTopology 'topology'; the dataframes are
+           only read by method Availability.availability_calc, so the same data can be shared by several instances
+
+    '''
+
+    profiler = profiler or RunProfiler()
+    # The topology is checked against the headers of the .csv files before reading them, so a configuration that
+    # does not match the data fails without parsing it
+    with profiler.stage('topology'):
+        topology = load_topology(root_path, timeframe, topology_file)
+    folder_list = [os.path.join(root_path, folder) for folder in ['Met_Data', 'SCB_Data', 'INV_Data']]
+    with profiler.stage('read_met_data') as stage:
+        met_data = met(folder_list[0], timeframe, dtype=dtype, cache=cache)
+        stage['rows'], stage['columns'] = met_data.shape
+    # function scb returns a tuple, the first element being a dataframe and the second being a dictionary
+    # Refer to the docstring of function scb; the groups of string boxes are aligned below with the rest of data
+    with profiler.stage('read_SCB_data') as stage:
+        scb_dict = scb(folder_list[1], timeframe, dtype=dtype, cache=cache, align=False)[1]
+        stage['rows'] = max([len(df) for df in scb_dict.values()], default=0)
+        stage['columns'] = sum(len(df.columns) for df in scb_dict.values())
+    with profiler.stage('read_inv_data') as stage:
+        inv_data = inv(folder_list[2], timeframe, dtype=dtype, cache=cache)
+        stage['rows'], stage['columns'] = inv_data.shape
+    
+    # All sources are reindexed in a single pass on a common regular time grid, with step freq or the most common
+    # step of the data, that covers the month of a 'YYYY_MM' timeframe; the timestamps missing in any source,
+    # repeated or out of the grid are reported in the dataframe alignment instead of being silently dropped by
+    # joining the sources on their timestamps
+    with profiler.stage('align') as stage:
+        aligned, alignment = align_frames({'MET': met_data, 'SCB': scb_dict, 'INV': inv_data}, freq,
+                                          *timeframe_bounds(timeframe))
+        scb_data, scb_dict = aligned['SCB']
+        stage['rows'] = len(aligned['MET'])
+        stage['columns'] = sum(df.shape[1] for df in [aligned['MET'], scb_data, aligned['INV']])
+    if verbose:
+        for line in report_summary(alignment):
+            print('Warning: ' + line)
+    topology.check_data(aligned['MET'], scb_data, aligned['INV'])
+        
+    return {'met_data': aligned['MET'], 'scb_data': scb_data, 'scb_dict': scb_dict, 'inv_data': aligned['INV'],
+            'alignment': alignment, 'topology': topology}
 
 
 class Availability:   
     
-    def __init__(self, proj_name, timeframe):
+    def __init__(self, proj_name, timeframe, cache_dir=None, root_path=None, freq=None, profiler=None,
+                 dtype='float64', data=None, topology_file=None, verbose=True):
         self.proj_name = proj_name
         self.timeframe = timeframe
-        folder_list = ['Met_Data', 'SCB_Data', 'INV_Data']
-        self.met_data = met(folder_list[0], timeframe)
-        self.scb_data = scb(folder_list[1], timeframe)[0] # function scb returns a tuple, the first element
-                                                          # being a dataframe and the second being a dictionary
-                                                          # Refer to the docstring of function scb
-        self.scb_dict = scb(folder_list[1], timeframe)[1]
-        self.inv_data = inv(folder_list[2], timeframe)
+        # Every stage of the run is timed by the profiler; a RunProfiler with memory=True also samples the peak memory
+        # of each stage. The run report is given by self.profiler.report()
+        self.profiler = profiler or RunProfiler(proj_name=proj_name, timeframe=timeframe)
+        # The data folders are looked for in root_path, the folder of the project, or in the current working directory
+        # when root_path is not given; the output spreadsheet is saved in the same folder
+        self.root_path = root_path or os.getcwd()
+        # When a cache folder is given, the cleaned data of the .csv files that have not changed since a previous run
+        # is loaded from the cache instead of parsing the .csv files again
+        self.cache = DataCache(cache_dir) if cache_dir else None
+        # The measurements are kept as dtype; 'float32' halves their memory, the .csv values of 3 decimals being 
+        # rounded by less than 0.001 below 10^4 (refer to Benchmarks/bench_memory.py for the tolerance check of the
+        # results against 'float64')
+        self.dtype = dtype
+        # The warnings of the alignment and the results are printed unless verbose is False, e.g. in a service
+        self.verbose = verbose
+        # The data already read by function read_project can be given in data, e.g. by a service that keeps it in
+        # memory between calculations, instead of being read again
+        if data is None:
+            data = read_project(self.root_path, timeframe, self.cache, freq, dtype, self.profiler, topology_file,
+                                verbose)
+        self.met_data, self.scb_data, self.scb_dict = data['met_data'], data['scb_data'], data['scb_dict']
+        self.inv_data, self.alignment, self.topology = data['inv_data'], data['alignment'], data['topology']
         
         
-    def availability_calc(self, scb_no_comm = [], interv_no_comm = []):
+    def availability_calc(self, scb_no_comm = [], interv_no_comm = [], outage_tickets = None, report = True,
+                          backend = 'xlsx', include_raw = True):
         '''
 
         Parameters
         ----------
-        scb_no_comm : TYPE, optional
-            DESCRIPTION. The default is []. Feature intended to manually add intervals of no communications of string
-                                            boxes, yet to be implemented
-        interv_no_comm : TYPE, optional
-            DESCRIPTION. The default is []. Feature intended to manually add intervals of no communications of inverters,
-                                            yet to be implemented
+        scb_no_comm : List, optional
+            DESCRIPTION. The default is []. String boxes ("SCB I-N") or inverters ("INV I") without communications
+        interv_no_comm : List, optional
+            DESCRIPTION. The default is []. Tuples (start, end) with the intervals without communications of all the
+                                            elements of scb_no_comm; when empty, they have no communications during
+                                            the whole timeframe
+        outage_tickets : String, Pandas Dataframe or Dictionary, optional
+            DESCRIPTION. The default is None. Intervals without communications of each element, given as the path of
+                                              a .csv file or a dataframe with columns 'element', 'start' and 'end', or
+                                              as a dictionary {element: [(start, end), ...]}
+        report : Boolean, optional
+            DESCRIPTION. The default is True. Whether to create the output report; when False, the results are only
+                                              kept in the attributes of the instance
+        backend : String, optional
+            DESCRIPTION. The default is 'xlsx'. Format of the output report: 'xlsx' (streamed workbook), 'excel' 
+                                                (pandas workbook), 'parquet' or 'csv'; refer to function write_report
+        include_raw : Boolean, optional
+            DESCRIPTION. The default is True. Whether the output report includes the raw data sheets
 
         Returns
         -------
-        Output .xlsx spreadsheet named 'filename' including the availability calculation
+        Output .xlsx spreadsheet (or .parquet/.csv files) named 'filename' including the availability calculation
 
         '''
 
-        # I am creating a new dataframe which index is the index from one of the three dataframes calculated
-        # by the functions called when constructing the Availability instance; the three dataframes have the same index
-        self.avail_df = pd.DataFrame(index=self.met_data.index)
-        
-        # I am creating column 'HGPOAm'; when the average of the readings of the trhee inclined pyranometers
-        # is greater than 300 W/m2, value is 1; otherwise is 0
-        self.avail_df['HGPOAm'] = np.where(self.met_data[['RAD_3 [W/m2]', 'RAD_4 [W/m2]', 'RAD_5 [W/m2]']].mean(axis=1) > 300, 1, 0)
-        
-        # I will add two columns: the first column 'GPOAI' being the global inclined irradiation measured by the inclined
-        # pyranometers (kWh/m2), and the second one 'GHI' being the global horizontal irradiation measured by the horizontal
-        # pyranometers (kWh/m2)
-        self.avail_df['GPOAI'] = self.met_data[['RAD_3 [W/m2]', 'RAD_4 [W/m2]', 'RAD_5 [W/m2]']].mean(axis=1) / 1000
-        self.avail_df['GHI'] = self.met_data[['RAD_1 [W/m2]', 'RAD_2 [W/m2]']].mean(axis=1) / 1000
-            
-        # I will create a dictionary where each key contains a dataframe including the string boxes pertaining
-        # to each inverter; each column will be 1 if avail_df['HGPOAm'] == 1 and if active power of that 
-        # string box at this hour is greater than 5 kW
-        self.avail_scb = {}
-        for key in self.scb_dict:
-            self.avail_scb[key] = pd.DataFrame(index=self.scb_data.index)
-            for col in self.scb_dict[key].columns:
-                self.avail_scb[key][col] = np.where((self.scb_dict[key][col] > 5) & (self.avail_df['HGPOAm'] == 1), 1, 0)
+        # The three dataframes calculated by the functions called when constructing the Availability instance have
+        # the same index, so I can work on their numpy arrays; the string boxes are assigned to the inverters by the
+        # topology of the plant (by default, by the position of their group in scb_dict), and inverters are numbered
+        # by the position of their column
+        # The timestamps missing in any source are kept in the output but not counted in the calculation
+        # Each block of the calculation is a stage of the profiler, named 'availability_calc.<block>'
+        index = self.met_data.index
+        complete = complete_mask(index, self.alignment)
+        topology = self.topology
         
-        # I will create a dataframe where each column represents one of the inverters of the project
-        # Each column will be 1 if active power of the corresponding inverter at that hour is > 0 OR the data is missing,
-        # AND avail_df['HGPOAm'] == 1
-        self.avail_inv = pd.DataFrame(index=self.scb_data.index)
-        for col in self.inv_data.columns:
-            self.avail_inv['HPm-I' + str(self.inv_data.columns.get_loc(col)+1)] = \
-                          np.where(((self.inv_data[col] > 0) | (self.inv_data[col].isnull())) & (self.avail_df['HGPOAm'] == 1), 1, 0)
-
-
-# The next block of code is intended to manually include intervals of no communications into the availability calculation        
         # If there is any string box without communications, this information is manually given in the variable
-        # scb_no_comm, that is a list containing the elements suffering from communication problems
-        # Any string box is denominated as "SCB I-N", being I the inverter number they belong to, and N a correlative
-        # number for all string boxes that belong to each inverter; I will extract the I so that I can identify to which
-        # inverter the string box belongs
-        self.inv_no_comm = []
-        for scb in scb_no_comm:
-            self.inv = int(scb.split()[1].split('-')[0]) # Extract the inverter "I" from a string with structure "SCB I-N"
-            self.inv_no_comm.append(self.inv)
-        self.inv_no_comm = list(set(self.inv_no_comm)) # Elimination of potential duplicates with set
-        
-        # I want to create a new dataframe where the columns represent communication problems from the string boxes
-        # belonging to each group of inverters; if there is a communication problem in a string box that belongs to
-        # inverter 3, then the column that represent inverter 3 will show 1 meaning that at that time there was a 
-        # communication problem
-        self.cont_inv = 1
-        self.inv_comms = pd.DataFrame(index=self.inv_data.index)
-        for elem in self.inv_data.columns:
-            if self.cont_inv in self.inv_no_comm:    
-                self.inv_comms['COM-I' + str(self.cont_inv)] = np.where(self.avail_df['HGPOAm'] == 1, 1, 0)
-            else:
-                self.inv_comms['COM-I' + str(self.cont_inv)] = 0
-            self.cont_inv += 1            
-            
-        # I have to limit the intervals of communication problems to those given as input in variable "interv_no_comm" 
-        # when calling the method; "interv_no_comm" is a list of tuples, where each tuple has two elements, the first 
-        # element being the start of the interval and the second the end of the interval
-        for tup in interv_no_comm:
-            interv = pd.date_range(tup[0], tup[1], freq='H')
-            for col in self.inv_comms.columns:
-                self.inv_comms[col] = np.where(self.inv_comms.index.isin(interv) == True, self.inv_comms[col], 0)
-            # test.availability_calc(scb_no_comm=['SCB 1-06', 'SCB 5-10'], interv_no_comm=[('2020-10-01 01:00:00', '2020-10-03 19:00:00')])
+        # scb_no_comm, that is a list containing the elements suffering from communication problems, during the
+        # intervals given in the variable "interv_no_comm", a list of tuples (start, end); the tickets in outage_tickets
+        # give the intervals of each element separately
+        # Any string box is denominated as in the header of its .csv file, usually "SCB I-N", being I the inverter
+        # number they belong to, and N a correlative number for all string boxes that belong to each inverter; the
+        # inverter of each element is looked up in the topology of the plant; the string boxes of an inverter are
+        # considered without communications whenever any of them has a ticket, and overlapping tickets are merged
+        # test.availability_calc(scb_no_comm=['SCB 1-06', 'SCB 5-10'], interv_no_comm=[('2020-10-01 01:00:00', '2020-10-03 19:00:00')])
+        with self.profiler.stage('availability_calc.tickets') as stage:
+            tickets = [tickets_from_elements(scb_no_comm, interv_no_comm), as_tickets(outage_tickets)]
+            tickets = pd.concat([df for df in tickets if len(df)] or tickets[:1], ignore_index=True)
+            self.inv_no_comm = sorted(set(tickets['element'].map(topology.element_inverter)))
+            no_comm = outage_mask(index, tickets, len(self.inv_data.columns), topology.element_inverter)
+            stage['rows'], stage['columns'] = no_comm.shape
         
-        # I will create a dataframe where each column represents one of the inverters of the project,
-        # and I will calculate the availability of the string boxes at inverter level. I will first check whether
-        # HGPOAm is 1, in which case I will sum the availability of all string boxes pertaining to that inverter
-        self.cont_scb_group = 1
-        self.avail_scb_per_inv = pd.DataFrame(index=self.scb_data.index)
-        for key in self.avail_scb:
-            # self.avail_scb_per_inv['Am-I' + str(self.cont_scb_group)] = np.where(self.avail_df['HGPOAm'] == 1, \
-            #                                                                      self.avail_scb[key].sum(axis=1), 0)
-            self.avail_scb_per_inv['Am-I' + str(self.cont_scb_group)] = np.where(self.avail_df['HGPOAm'] == 1, \
-                                                                           np.where(self.inv_comms['COM-I' + str(self.cont_scb_group)] == 0, \
-                                                                              self.avail_scb[key].sum(axis=1), \
-                                                                              self.avail_inv['HPm-I' + str(self.cont_scb_group)] * len(self.avail_scb[key].columns)), 0)
-            self.cont_scb_group += 1
-            
-        # I have now all elements to calculate availability of the project
-        # I will add a column called 'HPm' to dataframe avail_df that sums all columns of avail_scb_per_inv
-        # and will divide the result by the total number of string boxes of the project
-        # I will add another column called 'Am' that calculates string box availability on a hourly basis
-        self.avail_df['HPm'] = self.avail_scb_per_inv.sum(axis=1) / len(self.scb_data.columns)
-        self.avail_df['Am'] = self.avail_df['HPm'] / self.avail_df['HGPOAm']
+        # The kernel computes, for every timestamp, whether the average of the inclined pyranometers is greater than
+        # the irradiance threshold, 300 W/m2 by default (HGPOAm), the irradiation of the inclined (GPOAI) and 
+        # horizontal (GHI) pyranometers, the availability of every string box (active power > 5 kW by default) and
+        # inverter (active power > 0 or missing data), the communication problems and the string boxes available per
+        # inverter; the pyranometers, the inverter of each string box and the thresholds are those of the topology
+        with self.profiler.stage('availability_calc.kernel') as stage:
+            result = availability_kernel(**topology.kernel_inputs(self.met_data, self.scb_data, self.inv_data),
+                                         no_comm=no_comm, complete=complete)
+            stage['rows'], stage['columns'] = len(index), self.scb_data.shape[1] + self.inv_data.shape[1]
         
-        # I will add a column called 'HPm-I' to dataframe avail_df that sums all columns of avail_inv
-        # and will divide the result by the total number of inverters of the project
-        self.avail_df['HPm-I'] = self.avail_inv.sum(axis=1) / len(self.avail_inv.columns)
+        # The flags (HGPOAm, avail_scb, avail_inv and inv_comms) are kept as booleans of 1 byte, and the dataframes
+        # wrap the arrays of the kernel without copying them; the reports write the flags as 1 and 0
+        with self.profiler.stage('availability_calc.frames') as stage:
+            self.avail_df = pd.DataFrame({col: result[col] for col in ['HGPOAm', 'HPm', 'Am', 'GPOAI', 'GHI', 'HPm-I']},
+                                         index=index, copy=False)
+            avail_scb = pd.DataFrame(result['avail_scb'], index=index, columns=self.scb_data.columns, copy=False)
+            self.avail_scb = {key: avail_scb[self.scb_dict[key].columns] for key in self.scb_dict}
+            self.avail_inv = pd.DataFrame(result['avail_inv'], index=index, columns=topology.columns['HPm-I'],
+                                          copy=False)
+            self.inv_comms = pd.DataFrame(result['inv_comms'], index=index, columns=topology.columns['COM-I'],
+                                          copy=False)
+            self.avail_scb_per_inv = pd.DataFrame(result['avail_scb_per_inv'], index=index, copy=False,
+                                                  columns=topology.columns['Am-I'])
+            stage['rows'] = len(index)
+            stage['columns'] = sum(df.shape[1] for df in [self.avail_df, avail_scb, self.avail_inv, self.inv_comms,
+                                                          self.avail_scb_per_inv])
 
         # Now I can calculate availability at string box and inverter levels, as well as the 
         # irradiation gain originated by the one-axis trackers
-        self.month_avail_scb = self.avail_df['HPm'].sum(axis=0) / self.avail_df['HGPOAm'].sum(axis=0)
-        self.month_avail_inv = self.avail_df['HPm-I'].sum(axis=0) / self.avail_df['HGPOAm'].sum(axis=0)
-        self.irr_gain = (self.avail_df['GPOAI'].sum(axis=0) - self.avail_df['GHI'].sum(axis=0)) / \
-                             self.avail_df['GHI'].sum(axis=0)
+        with self.profiler.stage('availability_calc.kpis'):
+            self.month_avail_scb, self.month_avail_inv, self.irr_gain = availability_kpis(result)
         
         # Printing out the calculation results
-        print("Project availability at string box level is {:.2%}".format(self.month_avail_scb))
-        print("Project availability at inverter level is {:.2%}".format(self.month_avail_inv))
-        print("Irradiation gain is {:.2%}".format(self.irr_gain))
+        if self.verbose:
+            print("Project availability at string box level is {:.2%}".format(self.month_avail_scb))
+            print("Project availability at inverter level is {:.2%}".format(self.month_avail_inv))
+            print("Irradiation gain is {:.2%}".format(self.irr_gain))
         
         # Creation of another dataframe 'output_df' that combines previous most relevant data and calculations
-        self.output_df = pd.DataFrame(index=self.avail_df.index)
-        for key in self.avail_scb:
-            self.output_df = self.output_df.merge(self.avail_scb[key], left_index=True, right_index=True)
-            
-        self.list_of_columns = [self.avail_df['HGPOAm'], self.avail_df['HPm'], self.avail_df['Am'],
-                             self.avail_df['GPOAI'], self.avail_df['GHI'], self.avail_inv, 
-                             self.avail_scb_per_inv, self.inv_comms]
-        for item in self.list_of_columns:
-            self.output_df = self.output_df.merge(item, left_index=True, right_index=True)
+        with self.profiler.stage('availability_calc.output') as stage:
+            self.output_df = pd.concat([avail_scb, self.avail_df[['HGPOAm', 'HPm', 'Am', 'GPOAI', 'GHI']],
+                                        self.avail_inv, self.avail_scb_per_inv, self.inv_comms], axis=1)
+            stage['rows'], stage['columns'] = self.output_df.shape
             
-        # I will create an Excel workbook including all information, from raw data to availability calculations
-        filename = 'Availability Calc - ' + self.proj_name + ' - ' + self.timeframe + '.xlsx'
-        self.writer = pd.ExcelWriter(filename)
-        self.scb_data.to_excel(self.writer, sheet_name='RAW_SCB')
-        self.met_data.to_excel(self.writer, sheet_name='RAW_MET')
-        self.inv_data.to_excel(self.writer, sheet_name='RAW_INV')
-        self.output_df.to_excel(self.writer, sheet_name='AVA')
-        self.writer.save()
+        if not report:
+            return
             
+        # I will create an Excel workbook (or one file per sheet) including all information, from raw data to
+        # availability calculations
+        filename = os.path.join(self.root_path, 'Availability Calc - ' + self.proj_name + ' - ' + self.timeframe)
+        with self.profiler.stage('write_report') as stage:
+            sheets = {'RAW_SCB': self.scb_data, 'RAW_MET': self.met_data, 'RAW_INV': self.inv_data,
+                      'AVA': self.output_df}
+            self.report_files = write_report(filename, sheets, backend=backend, include_raw=include_raw)
+            stage['rows'] = sum(len(df) for name, df in sheets.items() if include_raw or name == 'AVA')
+            stage['columns'] = sum(df.shape[1] for name, df in sheets.items() if include_raw or name == 'AVA')
+            stage['files'] = self.report_files
+
+
+    def inverter_table(self):
+        '''
+        Returns
+        -------
+        table : Pandas Dataframe with a row per inverter (named as the columns of the inverter data) with its number
+                of string boxes 'SCBs', its availability at string box level 'avail_scb' and at inverter level
+                'avail_inv', and the number of timestamps with irradiance in which its string boxes had no
+                communications 'no_comm'; to be called after method availability_calc. The availabilities of the
+                project are the averages of those of the inverters weighted by their number of string boxes
+
+        '''
+
+        hgpoam = int(self.avail_df['HGPOAm'].sum())
+        n_scb = self.topology.scb_count
+        scb_avail = np.zeros(len(n_scb), dtype=np.int64)
+        scb_avail[:self.avail_scb_per_inv.shape[1]] = self.avail_scb_per_inv.sum(axis=0).to_numpy()
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.DataFrame({'SCBs': n_scb, 'avail_scb': scb_avail / n_scb / hgpoam,
+                                 'avail_inv': self.avail_inv.sum(axis=0).to_numpy() / hgpoam,
+                                 'no_comm': self.inv_comms.sum(axis=0).to_numpy()},
+                                index=pd.Index(self.inv_data.columns, name='inverter'))
+
+
+def main(argv=None):
+    '''
+    Command line entry point: parses argv (sys.argv[1:] when None) and runs the calculation it describes, so the
+    module can be imported as a library, and run by a worker that is already warm, without any side effect
+
+    Returns
+    -------
+    calc : Availability instance of the calculation run
+
+    '''
+
+    parser = argparse.ArgumentParser(description='Time based availability calculation of a solar PV project')
+    parser.add_argument('proj_name', help="project name used in the name of the output .xlsx file")
+    parser.add_argument('timeframe', help="subfolder of Met_Data, SCB_Data and INV_Data to read, e.g. '2020_09'")
+    parser.add_argument('--cache-dir', default=None, help="folder where the cleaned .csv data is cached between runs")
+    parser.add_argument('--format', default='xlsx', choices=BACKENDS, help="format of the output report")
+    parser.add_argument('--no-raw', action='store_true', help="do not include the raw data sheets in the report")
+    parser.add_argument('--freq', default=None, help="step of the time grid, e.g. '5min'; inferred by default")
+    parser.add_argument('--topology', default=None, metavar='JSON',
+                        help="topology of the plant; by default plant_topology.json of the project folder if it exists")
+    parser.add_argument('--dtype', default='float64', choices=['float64', 'float32'],
+                        help="data type of the measurements; float32 halves their memory")
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='JSON',
+                        help="time and sample the memory of every stage, print them and write the run report to "
+                             "JSON (by default 'Availability Profile - <proj_name> - <timeframe>.json')")
+    parser.add_argument('--profile-memory', default='rss', choices=['rss', 'tracemalloc'],
+                        help="how --profile samples the peak memory of every stage; refer to class RunProfiler")
+    parser.add_argument('--cprofile', default=None, metavar='FILE', help="dump cProfile statistics of the run to FILE")
+    args = parser.parse_args(argv)
+    
+    profiler = RunProfiler(memory=args.profile_memory if args.profile is not None else None, proj_name=args.proj_name,
+                           timeframe=args.timeframe)
+    if args.cprofile:
+        import cProfile
+        cprofiler = cProfile.Profile()
+        cprofiler.enable()
+    calc = Availability(args.proj_name, args.timeframe, cache_dir=args.cache_dir, freq=args.freq, profiler=profiler,
+                        dtype=args.dtype, topology_file=args.topology)
+    calc.availability_calc(backend=args.format, include_raw=not args.no_raw)
+    if args.cprofile:
+        cprofiler.disable()
+        cprofiler.dump_stats(args.cprofile)
+    
+    if args.profile is not None:
+        print(profiler.summary())
+        profiler.to_json(args.profile or os.path.join(calc.root_path, 'Availability Profile - ' + args.proj_name + 
+                                                      ' - ' + args.timeframe + '.json'))
+
+    return calc
+
 
-Availability(proj_name, timeframe).availability_calc()
+if __name__ == '__main__':
+    main()
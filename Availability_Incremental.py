@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Month-to-date availability that reads only the records appended to the .csv files since the previous run,
+keeping running totals in a state file.
+"""
+
+import os
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from Met_Data.Read_Met_Data import read_met_data as met
+from SCB_Data.Read_SCB_Data import read_SCB_data as scb
+from INV_Data.Read_Inv_Data import read_inv_data as inv
+from Common.Availability_Kernel import availability_kernel, AvailabilityTotals
+from Common.Outage_Intervals import as_tickets, outage_mask, tickets_from_elements
+from Common.Plant_Topology import load_topology
+from Common.Read_Csv_Data import first_records
+
+
+def frame_to_json(df):
+    # NaN values are stored as null, which is valid JSON
+    return {'index': df.index.strftime('%Y-%m-%dT%H:%M:%S').tolist(), 'columns': [str(col) for col in df.columns],
+            'values': df.astype(object).where(df.notna(), None).to_numpy().tolist()}
+
+
+def frame_from_json(data):
+    return pd.DataFrame(np.array(data['values'], dtype=float).reshape(len(data['index']), len(data['columns'])),
+                        index=pd.DatetimeIndex(data['index'], dtype='datetime64[ns]', name='Date'),
+                        columns=data['columns'])
+
+
+class IncrementalAvailability:
+    
+    def __init__(self, state_file, timeframe, root_path=None, scb_no_comm=[], interv_no_comm=[], outage_tickets=None,
+                 topology_file=None):
+        '''
+        Parameters
+        ----------
+        state_file : String with the path of the .json file where the running totals are persisted between updates;
+                     it is created by the first update
+        timeframe : String name of the timeframe subfolder to be read, e.g. '2020_09'
+        root_path : String, optional. The default is None, meaning the current working directory. Folder of the
+                    project, containing the 'Met_Data', 'SCB_Data' and 'INV_Data' folders
+        scb_no_comm, interv_no_comm, outage_tickets : Communication problems, as in method 
+                    Availability.availability_calc; they are stored in the state file when it is created, and giving
+                    different ones for an existing state file raises an error, because the totals would not match
+        topology_file : String, optional. The default is None. Configuration of the topology of the plant, as in
+                        function read_project; the state file is bound to its topology in the same way, and to its
+                        timeframe and root_path
+
+        '''
+        self.state_file = state_file
+        self.timeframe = timeframe
+        root_path = root_path or os.getcwd()
+        self.folder_list = [os.path.join(root_path, folder) for folder in ['Met_Data', 'SCB_Data', 'INV_Data']]
+        tickets = pd.concat([tickets_from_elements(scb_no_comm, interv_no_comm), as_tickets(outage_tickets)],
+                            ignore_index=True)
+        tickets = [[str(element), pd.Timestamp(start).isoformat(), pd.Timestamp(end).isoformat()] 
+                   for element, start, end in tickets.itertuples(index=False, name=None)]
+        
+        self.state = None
+        if os.path.exists(state_file):
+            with open(state_file) as f:
+                self.state = json.load(f)
+            # The offsets and totals of the state file only hold for the files of its project and timeframe
+            root = self.state.setdefault('root_path', os.path.abspath(root_path))
+            if self.state['timeframe'] != timeframe or os.path.abspath(root) != os.path.abspath(root_path):
+                raise ValueError('The state file {} was created for timeframe {} of {}; delete it or give another '
+                                 'state file'.format(state_file, self.state['timeframe'], root))
+            if (scb_no_comm or interv_no_comm or outage_tickets is not None) and tickets != self.state['tickets']:
+                raise ValueError('The state file {} was created with other communication problems; delete it to '
+                                 'recompute the timeframe'.format(state_file))
+        self.topology = load_topology(root_path, timeframe, topology_file)
+        
+        if self.state is None:
+            self.state = {'timeframe': timeframe, 'root_path': os.path.abspath(root_path), 'offsets': {},
+                          'pending': None, 'last': None, 'tickets': tickets, 'topology': self.topology.to_dict(),
+                          'totals': AvailabilityTotals().to_dict()}
+        elif self.state.setdefault('topology', self.topology.to_dict()) != self.topology.to_dict():
+            raise ValueError('The state file {} was created with another topology of the plant; delete it to '
+                             'recompute the timeframe'.format(state_file))
+        self.totals = AvailabilityTotals(self.state['totals'])
+        
+        
+    def read_new(self):
+        '''
+        Returns
+        -------
+        frames : Dictionary with the records appended to the .csv files since the previous update, preceded by the
+                 records read previously but not processed yet and without repeated timestamps: 'met' and 'inv' are
+                 dataframes, and 'scb' is a dictionary of dataframes, one for each group of string boxes
+
+        '''
+        
+        offsets = self.state['offsets']
+        frames = {'met': met(self.folder_list[0], self.timeframe, offsets=offsets),
+                  'scb': scb(self.folder_list[1], self.timeframe, offsets=offsets, align=False)[1],
+                  'inv': inv(self.folder_list[2], self.timeframe, offsets=offsets)}
+        
+        if self.state['pending']:
+            pending = self.state['pending']
+            frames['met'] = pd.concat([frame_from_json(pending['met']).set_axis(frames['met'].columns, axis=1),
+                                       frames['met']])
+            frames['inv'] = pd.concat([frame_from_json(pending['inv']).set_axis(frames['inv'].columns, axis=1),
+                                       frames['inv']])
+            frames['scb'] = {key: pd.concat([frame_from_json(pending['scb'][key]).set_axis(frames['scb'][key].columns,
+                                                                                          axis=1), frames['scb'][key]])
+                             for key in frames['scb']}
+        
+        # A repeated timestamp keeps its first record, read now or in a previous update, as in the full calculation
+        frames = {'met': first_records(frames['met']), 'inv': first_records(frames['inv']),
+                  'scb': {key: first_records(df) for key, df in frames['scb'].items()}}
+        
+        return frames
+    
+    
+    def update(self):
+        '''
+        Reads the records appended to the .csv files since the previous update, adds their contribution to the
+        running totals and persists them in the state file
+
+        Returns
+        -------
+        report : Dictionary with the number of new timestamps processed, the seconds taken by the update, and the
+                 month-to-date availabilities and irradiation gain
+
+        '''
+        
+        start = time.perf_counter()
+        frames = self.read_new()
+        sources = [frames['met'], frames['inv']] + list(frames['scb'].values())
+        
+        # A timestamp is processed once all the files have it; the records after the last timestamp common to all the
+        # files are kept as pending for the next update, because the other files may not have been appended yet
+        cutoff = min(df.index.max() for df in sources) if all(len(df) for df in sources) else None
+        index = frames['met'].index
+        for df in sources[1:]:
+            index = index.intersection(df.index, sort=True)
+        last = pd.Timestamp(self.state['last']) if self.state['last'] else None
+        index = index[(index <= cutoff) & (index > last if last is not None else True)] if cutoff is not None else \
+                index[:0]
+        
+        met_data = frames['met'].loc[index]
+        scb_data = pd.concat([frames['scb'][key].loc[index] for key in frames['scb']], axis=1)
+        inv_data = frames['inv'].loc[index]
+        tickets = pd.DataFrame(self.state['tickets'], columns=['element', 'start', 'end'])
+        result = availability_kernel(**self.topology.kernel_inputs(met_data, scb_data, inv_data),
+                                     no_comm=outage_mask(index, tickets, len(inv_data.columns),
+                                                         self.topology.element_inverter))
+        
+        # Running numerators and denominators of the month, and counters of each string box and inverter
+        self.totals.add(result, list(scb_data.columns), list(inv_data.columns))
+        
+        if len(index):
+            self.state['last'] = index[-1].isoformat()
+        after = (lambda df: df[df.index > cutoff]) if cutoff is not None else (lambda df: df)
+        self.state['pending'] = {'met': frame_to_json(after(frames['met'])), 'inv': frame_to_json(after(frames['inv'])),
+                                 'scb': {key: frame_to_json(after(df)) for key, df in frames['scb'].items()}}
+        
+        # The state is written to a temporary file that replaces the previous one, so an interrupted update does not
+        # corrupt it
+        with open(self.state_file + '.tmp', 'w') as f:
+            json.dump(self.state, f)
+        os.replace(self.state_file + '.tmp', self.state_file)
+        
+        report = {'rows': len(index), 'seconds': time.perf_counter() - start}
+        report.update(zip(['month_avail_scb', 'month_avail_inv', 'irr_gain'], self.kpis()))
+        
+        return report
+    
+    
+    def kpis(self):
+        '''
+        Returns
+        -------
+        month_avail_scb, month_avail_inv, irr_gain : Floats with the month-to-date availabilities at string box and
+                                                     inverter levels and irradiation gain; they are exactly equal to
+                                                     those of a full recalculation of the same timestamps
+
+        '''
+        
+        return self.totals.kpis()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Month-to-date availability updated with the newly appended data')
+    parser.add_argument('timeframe', help="subfolder of Met_Data, SCB_Data and INV_Data to read, e.g. '2020_09'")
+    parser.add_argument('--state', required=True, help="state .json file with the running totals")
+    parser.add_argument('--every', type=float, default=None, help="repeat the update every given seconds")
+    args = parser.parse_args()
+    
+    calc = IncrementalAvailability(args.state, args.timeframe)
+    while True:
+        report = calc.update()
+        print("{} new timestamps in {:.3f} s; availability at string box level {:.2%}, at inverter level {:.2%}, "
+              "irradiation gain {:.2%}".format(report['rows'], report['seconds'], report['month_avail_scb'],
+                                               report['month_avail_inv'], report['irr_gain']))
+        if args.every is None:
+            break
+        time.sleep(args.every)
@@ -0,0 +1,416 @@
+# -*- coding: utf-8 -*-
+"""
+Local HTTP service for ad-hoc recalculations: the data of every plant-month is read once and kept in memory, so a
+recalculation with other string boxes without communications or other outage tickets only runs the calculation.
+
+    POST /availability   {"plant": "Plant A", "timeframe": "2020_10", "scb_no_comm": ["SCB 1-06"],
+                          "interv_no_comm": [["2020-10-01 01:00", "2020-10-03 19:00"]],
+                          "outage_tickets": {"INV 3": [["2020-10-05 08:00", "2020-10-05 12:00"]]},
+                          "freq": null, "dtype": "float64", "tables": true}
+    GET /stats           counters of the dataset cache and of the requests
+    GET /health
+
+The plants are subfolders of the folder given to the service, each with its 'Met_Data', 'SCB_Data' and 'INV_Data'
+folders. The response gives the KPIs, the alignment issues and, unless "tables" is false, the table of every
+inverter (refer to method Availability.inverter_table). The calculations run in a pool of threads of the same
+process, so that all of them share the datasets in memory; numpy releases the GIL in most of the calculation.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import traceback
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from Availability_Calc import Availability, read_project
+from Common.Cache_Data import DataCache
+from Common.Align_Data import report_summary
+from Common.Plant_Topology import TOPOLOGY_FILE, TopologyError
+
+REQUEST_KEYS = ['plant', 'timeframe', 'scb_no_comm', 'interv_no_comm', 'outage_tickets', 'freq', 'dtype', 'tables']
+DTYPES = ['float64', 'float32']
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def project_signature(root_path, timeframe):
+    '''
+    Returns
+    -------
+    signature : Tuple with the name, size and modification time of every file of the timeframe subfolders of
+                'Met_Data', 'SCB_Data' and 'INV_Data' and of the topology file of the plant; it changes when any
+                .csv file is added, removed or written, or when the topology changes
+
+    '''
+
+    signature = []
+    for folder in ['Met_Data', 'SCB_Data', 'INV_Data']:
+        with os.scandir(os.path.join(root_path, folder, timeframe)) as entries:
+            signature += sorted((folder, entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+                                for entry in entries if entry.is_file())
+    if os.path.exists(os.path.join(root_path, TOPOLOGY_FILE)):
+        stat = os.stat(os.path.join(root_path, TOPOLOGY_FILE))
+        signature.append(('', TOPOLOGY_FILE, stat.st_size, stat.st_mtime_ns))
+
+    return tuple(signature)
+
+
+def dataset_bytes(data):
+    # The groups of string boxes of scb_dict are views of the columns of scb_data, so they are not counted again
+    return int(sum(data[key].memory_usage(index=True).sum() for key in ['met_data', 'scb_data', 'inv_data']))
+
+
+class DatasetCache:
+
+    def __init__(self, loader, max_bytes=1024 ** 3):
+        '''
+        In-memory cache of the datasets returned by loader, which evicts the least recently used ones when their size
+        exceeds max_bytes; concurrent requests of a dataset that is being loaded wait for that load instead of
+        loading it again. A dataset larger than max_bytes is returned but not kept, and an evicted dataset stays in
+        memory while a calculation still uses it
+
+        Parameters
+        ----------
+        loader : Function that returns the dataset of a key, called as loader(*key)
+        max_bytes : Integer, optional. The default is 1 GiB. Maximum size of the datasets kept, as given by function
+                    dataset_bytes
+
+        '''
+
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.datasets = OrderedDict()
+        self.loading = {}
+        self.nbytes = 0
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'loads': 0, 'coalesced': 0, 'evictions': 0, 'errors': 0}
+
+
+    def get(self, key):
+        '''
+        Returns
+        -------
+        data : Dataset of key
+        source : String, 'hit' when it was in memory, 'load' when this call loaded it and 'coalesced' when it waited
+                 for the load of another call
+
+        '''
+
+        with self.lock:
+            if key in self.datasets:
+                self.datasets.move_to_end(key)
+                self.counters['hits'] += 1
+                return self.datasets[key][0], 'hit'
+            future = self.loading.get(key)
+            if future is None:
+                future = self.loading[key] = Future()
+                self.counters['loads'] += 1
+                owner = True
+            else:
+                self.counters['coalesced'] += 1
+                owner = False
+
+        if not owner:
+            return future.result(), 'coalesced'
+        # The dataset is stored before the waiting calls are released, so later calls find it in memory; when the load
+        # or the store fails, the waiting calls get the same error instead of waiting forever
+        try:
+            data = self.loader(*key)
+            self.store(key, data)
+        except BaseException as error:
+            with self.lock:
+                self.loading.pop(key, None)
+                self.counters['errors'] += 1
+            future.set_exception(error)
+            raise
+        future.set_result(data)
+
+        return data, 'load'
+
+
+    def store(self, key, data):
+        nbytes = dataset_bytes(data)
+        with self.lock:
+            del self.loading[key]
+            if nbytes > self.max_bytes:
+                return
+            self.datasets[key] = (data, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                self.nbytes -= self.datasets.popitem(last=False)[1][1]
+                self.counters['evictions'] += 1
+
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, datasets=len(self.datasets), mib=self.nbytes / 2 ** 20,
+                        max_mib=self.max_bytes / 2 ** 20)
+
+
+def json_ready(value):
+    '''
+    Returns
+    -------
+    value : value with its numpy numbers as Python numbers and its NaN as None, nested in dictionaries and lists, so
+            that it can be written as standard JSON
+
+    '''
+
+    if isinstance(value, dict):
+        return {str(key): json_ready(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_ready(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+
+    return value
+
+
+class AvailabilityService:
+
+    def __init__(self, plants_dir, workers=None, max_bytes=1024 ** 3, cache_dir=None):
+        '''
+        Parameters
+        ----------
+        plants_dir : String with the folder of the plants, each of them being a subfolder with its 'Met_Data',
+                     'SCB_Data' and 'INV_Data' folders
+        workers : Integer, optional. The default is None, meaning as many as processors. Number of calculations run
+                  at the same time; the datasets are loaded by the threads of the requests, outside the pool, so the
+                  concurrent requests of a dataset wait for a single load whatever the number of workers
+        max_bytes : Integer, optional. The default is 1 GiB. Memory of the datasets kept by the DatasetCache
+        cache_dir : String, optional. The default is None. Folder of the cache of cleaned .csv data, used when a
+                    dataset is not in memory
+
+        '''
+
+        self.plants_dir = os.path.abspath(plants_dir)
+        self.cache_dir = cache_dir
+        self.datasets = DatasetCache(self.load, max_bytes)
+        self.pool = ThreadPoolExecutor(max_workers=workers or os.cpu_count())
+        self.requests = {'ok': 0, 'errors': 0}
+        self.lock = threading.Lock()
+
+
+    def load(self, plant, timeframe, freq, dtype, signature):
+        # signature only tells apart the versions of the .csv files of the same plant-month
+        cache = DataCache(self.cache_dir) if self.cache_dir else None
+
+        return read_project(os.path.join(self.plants_dir, plant), timeframe, cache, freq, dtype, verbose=False)
+
+
+    def parse(self, request):
+        '''
+        Parameters
+        ----------
+        request : Dictionary with the keys of REQUEST_KEYS, 'plant' and 'timeframe' being required
+
+        Returns
+        -------
+        request : Dictionary with the values of request checked and the defaults of the missing keys
+
+        '''
+
+        if not isinstance(request, dict):
+            raise BadRequest('the request must be a JSON object')
+        unknown = set(request) - set(REQUEST_KEYS)
+        if unknown:
+            raise BadRequest('unknown keys: ' + ', '.join(sorted(unknown)))
+        # The plant and the timeframe name a subfolder each, so they can not reach other folders
+        for key in ['plant', 'timeframe']:
+            name = request.get(key)
+            if not isinstance(name, str) or name in ['', '.', '..'] or os.path.basename(name) != name:
+                raise BadRequest(key + ' must be the name of a folder')
+        request = dict({'scb_no_comm': [], 'interv_no_comm': [], 'outage_tickets': None, 'freq': None,
+                        'dtype': 'float64', 'tables': True}, **request)
+        if request['dtype'] not in DTYPES:
+            raise BadRequest('dtype must be one of {}'.format(DTYPES))
+        if not isinstance(request['scb_no_comm'], list) or not isinstance(request['interv_no_comm'], list):
+            raise BadRequest('scb_no_comm and interv_no_comm must be lists')
+        if any(not isinstance(interval, list) or len(interval) != 2 for interval in request['interv_no_comm']):
+            raise BadRequest('interv_no_comm must be a list of [start, end]')
+        # The tickets are only taken as a dictionary; a string would be read as the path of a .csv file
+        if request['outage_tickets'] is not None and not isinstance(request['outage_tickets'], dict):
+            raise BadRequest('outage_tickets must be a dictionary {element: [[start, end], ...]}')
+
+        return request
+
+
+    def dataset(self, request):
+        '''
+        Returns
+        -------
+        data : Dictionary returned by function read_project for the plant-month of request, as parsed by method parse
+        source : String, 'hit', 'load' or 'coalesced'; refer to method DatasetCache.get
+
+        '''
+
+        signature = project_signature(os.path.join(self.plants_dir, request['plant']), request['timeframe'])
+
+        return self.datasets.get((request['plant'], request['timeframe'], request['freq'], request['dtype'], signature))
+
+
+    def calculate(self, request, dataset=None):
+        '''
+        Parameters
+        ----------
+        request : Dictionary with the keys of REQUEST_KEYS; refer to the docstring of this module
+        dataset : Tuple (data, source), optional. The default is None, meaning that it is given by method dataset
+
+        Returns
+        -------
+        response : Dictionary with the plant, timeframe, KPIs, lines of the alignment issues, the table of every inverter (unless
+                   request['tables'] is False), where the dataset came from ('hit', 'load' or 'coalesced') and the
+                   seconds it took
+
+        '''
+
+        start = time.perf_counter()
+        request = self.parse(request)
+        plant, timeframe = request['plant'], request['timeframe']
+        data, source = dataset or self.dataset(request)
+
+        calc = Availability(plant, timeframe, root_path=os.path.join(self.plants_dir, plant), dtype=request['dtype'],
+                            data=data, verbose=False)
+        calc.availability_calc(scb_no_comm=request['scb_no_comm'],
+                               interv_no_comm=[tuple(interval) for interval in request['interv_no_comm']],
+                               outage_tickets=request['outage_tickets'], report=False)
+        response = {'plant': plant, 'timeframe': timeframe,
+                    'kpis': {'month_avail_scb': calc.month_avail_scb, 'month_avail_inv': calc.month_avail_inv,
+                             'irr_gain': calc.irr_gain},
+                    'alignment': report_summary(calc.alignment), 'dataset': source}
+        if request['tables']:
+            response['inverters'] = calc.inverter_table().reset_index().to_dict('records')
+        response['seconds'] = time.perf_counter() - start
+
+        return json_ready(response)
+
+
+    def submit(self, request):
+        '''
+        Loads the dataset of request in the current thread, unless it is in memory, and then runs method calculate in
+        the pool of workers; the loads are kept out of the pool, so that the requests that wait for the load of
+        another request do not hold its workers
+
+        Returns
+        -------
+        status : Integer HTTP status: 200, 400 for an invalid request, 404 for a plant or timeframe not found, 422
+                 for a topology of the plant that does not match its data and 500 for any other error
+        response : Dictionary returned by method calculate, or with key 'error'
+
+        '''
+
+        start = time.perf_counter()
+        try:
+            request = self.parse(request)
+            response = self.pool.submit(self.calculate, request, self.dataset(request)).result()
+            status, response['seconds'] = 200, time.perf_counter() - start
+        except BadRequest as error:
+            status, response = 400, {'error': str(error)}
+        except TopologyError as error:
+            status, response = 422, {'error': 'topology: ' + str(error)}
+        except FileNotFoundError as error:
+            status, response = 404, {'error': 'not found: ' + os.path.relpath(error.filename or '', self.plants_dir)}
+        except Exception:
+            status, response = 500, {'error': traceback.format_exc(limit=1).strip().splitlines()[-1]}
+        with self.lock:
+            self.requests['ok' if status == 200 else 'errors'] += 1
+
+        return status, response
+
+
+    def stats(self):
+        with self.lock:
+            return {'datasets': self.datasets.stats(), 'requests': dict(self.requests)}
+
+
+    def close(self):
+        self.pool.shutdown()
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+
+    # The service is given to the handlers by the server, as attribute service
+    protocol_version = 'HTTP/1.1'
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.send_json(200, {'status': 'ok'})
+        elif self.path == '/stats':
+            self.send_json(200, self.server.service.stats())
+        else:
+            self.send_json(404, {'error': 'not found: ' + self.path})
+
+
+    def do_POST(self):
+        if self.path != '/availability':
+            self.send_json(404, {'error': 'not found: ' + self.path})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        except ValueError as error:
+            self.send_json(400, {'error': 'invalid JSON: ' + str(error)})
+            return
+        self.send_json(*self.server.service.submit(request))
+
+
+    def log_message(self, format, *args):
+        # Every request is logged to the standard error unless the server is quiet
+        if not getattr(self.server, 'quiet', False):
+            super().log_message(format, *args)
+
+
+def make_server(service, host='127.0.0.1', port=8080, quiet=False):
+    '''
+    Returns
+    -------
+    server : ThreadingHTTPServer serving the AvailabilityService service on host and port (a free port when 0, given
+             by server.server_address), to be run with its method serve_forever
+
+    '''
+
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.daemon_threads = True
+    server.service, server.quiet = service, quiet
+
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='HTTP service of availability recalculations with the data in memory')
+    parser.add_argument('plants_dir', help="folder with a subfolder per plant")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen to; only this computer by default")
+    parser.add_argument('--port', type=int, default=8080, help="port to listen to")
+    parser.add_argument('--workers', type=int, default=None, help="calculations run at the same time")
+    parser.add_argument('--max-mib', type=float, default=1024, help="memory of the datasets kept in memory (MiB)")
+    parser.add_argument('--cache-dir', default=None, help="folder where the cleaned .csv data is cached between runs")
+    parser.add_argument('--quiet', action='store_true', help="do not log every request")
+    args = parser.parse_args()
+
+    service = AvailabilityService(args.plants_dir, args.workers, int(args.max_mib * 2 ** 20), args.cache_dir)
+    server = make_server(service, args.host, args.port, args.quiet)
+    print('Serving {} on http://{}:{}'.format(service.plants_dir, *server.server_address[:2]), file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Availability of long, high-resolution datasets read by chunks of records, so that the files are never held in
+memory at once.
+"""
+
+import os
+import argparse
+import pandas as pd
+from Met_Data.Read_Met_Data import read_met_data as met
+from SCB_Data.Read_SCB_Data import read_SCB_data as scb
+from INV_Data.Read_Inv_Data import read_inv_data as inv
+from Common.Read_Csv_Data import align_chunks
+from Common.Availability_Kernel import availability_kernel, AvailabilityTotals
+from Common.Outage_Intervals import as_tickets, outage_mask, tickets_from_elements
+from Common.Plant_Topology import load_topology
+
+
+def stream_chunks(timeframe, root_path=None, chunk_rows=50000, dtype='float64'):
+    '''
+    Parameters
+    ----------
+    timeframe : String name of the timeframe subfolder to be read, e.g. '2020_09'
+    root_path : String, optional. The default is None, meaning the current working directory. Folder of the project,
+                containing the 'Met_Data', 'SCB_Data' and 'INV_Data' folders
+    chunk_rows : Integer, optional. The default is 50000. Number of records read at once from each .csv file
+    dtype : String or numpy dtype, optional. The default is 'float64'. Data type of the measurements
+
+    Returns
+    -------
+    chunks : Generator of tuples (met_data, scb_data, scb_dict, inv_data), one for each time chunk, the dataframes of
+             each tuple having the same timestamps, as the attributes of an Availability instance
+
+    '''
+    
+    folder_list = [os.path.join(root_path or os.getcwd(), folder) for folder in ['Met_Data', 'SCB_Data', 'INV_Data']]
+    scb_chunks = scb(folder_list[1], timeframe, dtype=dtype, chunk_rows=chunk_rows)
+    scb_dicts = []
+    
+    def scb_frames():
+        # The string box chunks are aligned with the others through their merged dataframe; I keep the grouping of
+        # the string boxes of each chunk to rebuild scb_dict afterwards
+        for scb_data, scb_dict in scb_chunks:
+            scb_dicts.append(scb_dict)
+            yield scb_data
+            
+    for met_data, scb_data, inv_data in align_chunks([met(folder_list[0], timeframe, dtype=dtype, chunk_rows=chunk_rows),
+                                                      scb_frames(),
+                                                      inv(folder_list[2], timeframe, dtype=dtype, chunk_rows=chunk_rows)]):
+        scb_dict = {key: scb_data[df.columns] for key, df in scb_dicts[-1].items()}
+        del scb_dicts[:-1]
+        yield met_data, scb_data, scb_dict, inv_data
+
+
+def stream_availability(timeframe, root_path=None, chunk_rows=50000, scb_no_comm=[], interv_no_comm=[],
+                        outage_tickets=None, dtype='float64', topology_file=None):
+    '''
+    Calculates the availabilities and irradiation gain of a timeframe reading the .csv files by time chunks, so the
+    memory used depends on chunk_rows and the number of columns, not on the length of the timeframe. Each .csv file
+    holds up to about two chunks of records while they are aligned, and the kernel allocates about 30 bytes per 
+    string box per record of a chunk; e.g. with 1000 string boxes and chunk_rows=50000, the peak is about 2 GB 
+    whatever the number of years of the data
+
+    Parameters
+    ----------
+    timeframe : String name of the timeframe subfolder to be read, e.g. '2020_09'
+    root_path : String, optional. The default is None, meaning the current working directory. Folder of the project
+    chunk_rows : Integer, optional. The default is 50000. Number of records read at once from each .csv file
+    scb_no_comm, interv_no_comm, outage_tickets : Communication problems, as in method Availability.availability_calc
+    dtype : String or numpy dtype, optional. The default is 'float64'. Data type of the measurements
+    topology_file : String, optional. The default is None. Configuration of the topology of the plant, as in
+                    function read_project
+
+    Returns
+    -------
+    month_avail_scb, month_avail_inv, irr_gain : Floats, exactly equal to those calculated by method
+                                                 Availability.availability_calc on the whole timeframe
+    totals : AvailabilityTotals with the running totals and the counters of each string box and inverter
+
+    '''
+    
+    tickets = pd.concat([tickets_from_elements(scb_no_comm, interv_no_comm), as_tickets(outage_tickets)], 
+                        ignore_index=True)
+    totals = AvailabilityTotals()
+    topology = load_topology(root_path or os.getcwd(), timeframe, topology_file)
+    for met_data, scb_data, scb_dict, inv_data in stream_chunks(timeframe, root_path, chunk_rows, dtype):
+        result = availability_kernel(**topology.kernel_inputs(met_data, scb_data, inv_data),
+                                     no_comm=outage_mask(met_data.index, tickets, len(inv_data.columns),
+                                                         topology.element_inverter))
+        totals.add(result, list(scb_data.columns), list(inv_data.columns))
+        
+    return totals.kpis() + (totals,)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time based availability calculation reading the data by chunks')
+    parser.add_argument('timeframe', help="subfolder of Met_Data, SCB_Data and INV_Data to read, e.g. '2020_09'")
+    parser.add_argument('--chunk-rows', type=int, default=50000, help="records read at once from each .csv file")
+    args = parser.parse_args()
+    
+    month_avail_scb, month_avail_inv, irr_gain, totals = stream_availability(args.timeframe, chunk_rows=args.chunk_rows)
+    print("Project availability at string box level is {:.2%}".format(month_avail_scb))
+    print("Project availability at inverter level is {:.2%}".format(month_avail_inv))
+    print("Irradiation gain is {:.2%}".format(irr_gain))
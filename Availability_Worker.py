@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Warm worker: a long-running process that reads one job per line of its standard input, as a JSON object, and writes
+the result of each job as a JSON line to its standard output, so that repeated calculations do not pay the start of
+the interpreter and the import of pandas each time. A job gives the keys 'root' and 'timeframe' and, optionally, any
+argument of function run_job, e.g.
+
+    {"root": "Plants/Plant A", "timeframe": "2020_10", "backend": "parquet", "report": false}
+
+The calculations run without printing their warnings and results, so the standard output only holds the results of
+the jobs.
+"""
+
+import sys
+import json
+import argparse
+import importlib
+import contextlib
+from Batch_Availability import run_job
+from Common.Write_Report import BACKENDS
+
+# Engines imported by the writers of each backend the first time they are used
+ENGINES = {'xlsx': ['xlsxwriter'], 'excel': ['openpyxl'], 'parquet': ['pyarrow'], 'csv': []}
+JOB_KEYS = ['cache_dir', 'report', 'backend', 'include_raw', 'dtype']
+
+
+def warm_up(backends=('xlsx',)):
+    '''
+    Imports the engines of the writers of backends, so that the first job does not pay for it
+
+    Parameters
+    ----------
+    backends : Iterable of strings, optional. The default is ('xlsx',). Formats of the reports the worker will write
+
+    '''
+
+    for backend in backends:
+        for engine in ENGINES[backend]:
+            with contextlib.suppress(ImportError):
+                importlib.import_module(engine)
+
+
+def handle(line, defaults=None):
+    '''
+    Parameters
+    ----------
+    line : String with a job as a JSON object, as described in the docstring of this module
+    defaults : Dictionary, optional. The default is None. Arguments of function run_job used when the job does not
+               give them
+
+    Returns
+    -------
+    row : Dictionary returned by function run_job; a job that can not be read returns its error instead
+
+    '''
+
+    try:
+        job = json.loads(line)
+        options = dict(defaults or {}, **{key: job[key] for key in JOB_KEYS if key in job})
+        root, timeframe = job['root'], job['timeframe']
+    except (ValueError, TypeError, KeyError) as error:
+        return {'status': 'error: invalid job ' + repr(error)}
+
+    return run_job((root, timeframe), verbose=False, **options)
+
+
+def serve(lines, out, defaults=None):
+    '''
+    Runs the jobs of lines one after the other, writing the result of each one to out as soon as it finishes
+
+    Parameters
+    ----------
+    lines : Iterable of strings, one job per string (e.g. sys.stdin)
+    out : Writable text file (e.g. sys.stdout)
+    defaults : Dictionary, optional. The default is None. Arguments of function run_job used when a job does not
+               give them
+
+    Returns
+    -------
+    n_jobs : Integer number of jobs run
+
+    '''
+
+    n_jobs = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        out.write(json.dumps(handle(line, defaults)) + '\n')
+        out.flush()
+        n_jobs += 1
+
+    return n_jobs
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Runs the availability jobs read as JSON lines from the standard input')
+    parser.add_argument('--cache-dir', default=None, help="folder where the cleaned .csv data is cached between runs")
+    parser.add_argument('--format', default='xlsx', choices=BACKENDS, help="default format of the reports")
+    parser.add_argument('--no-raw', action='store_true', help="do not include the raw data sheets in the reports")
+    parser.add_argument('--dtype', default='float64', choices=['float64', 'float32'],
+                        help="default data type of the measurements")
+    args = parser.parse_args()
+
+    warm_up([args.format])
+    serve(sys.stdin, sys.stdout, {'cache_dir': args.cache_dir, 'backend': args.format, 'include_raw': not args.no_raw,
+                                  'dtype': args.dtype})
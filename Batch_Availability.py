@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Batch runner of the availability calculation for several plants and months on a pool of processes.
+"""
+
+import os
+import glob
+import time
+import argparse
+import traceback
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from Availability_Calc import Availability
+from Common.Write_Report import BACKENDS
+
+
+def find_jobs(plant_roots, timeframes):
+    '''
+    Parameters
+    ----------
+    plant_roots : List of strings with the folders of the projects, each of them containing the 'Met_Data', 'SCB_Data'
+                  and 'INV_Data' folders; glob patterns such as 'Plants/*' are expanded
+    timeframes : List of strings with the timeframes to calculate; glob patterns such as '2020_*' are expanded against
+                 the subfolders of 'Met_Data' of each project
+
+    Returns
+    -------
+    jobs : List of tuples (plant root, timeframe), one for each plant-month to calculate
+
+    '''
+    
+    roots = []
+    for pattern in plant_roots:
+        roots += sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        
+    jobs = []
+    for root in roots:
+        for pattern in timeframes:
+            if glob.has_magic(pattern):
+                jobs += [(root, os.path.basename(path)) for path in 
+                         sorted(glob.glob(os.path.join(root, 'Met_Data', pattern))) if os.path.isdir(path)]
+            else:
+                jobs.append((root, pattern))
+                
+    return jobs
+
+
+def run_job(job, cache_dir=None, report=True, backend='xlsx', include_raw=True, dtype='float64', verbose=True):
+    '''
+    Parameters
+    ----------
+    job : Tuple (plant root, timeframe) as returned by function find_jobs
+    cache_dir : String, optional. The default is None. Folder of the cache of cleaned .csv data
+    report : Boolean, optional. The default is True. Whether to create the output report of the job
+    backend : String, optional. The default is 'xlsx'. Format of the output report; refer to function write_report
+    include_raw : Boolean, optional. The default is True. Whether the output report includes the raw data sheets
+    dtype : String, optional. The default is 'float64'. Data type of the measurements; refer to class Availability
+    verbose : Boolean, optional. The default is True. Whether the calculation prints its warnings and results
+
+    Returns
+    -------
+    row : Dictionary with the plant, timeframe, availabilities and irradiation gain of the job, its status and the 
+          seconds it took; a failing job returns its error instead of raising it, so it does not stop the batch
+
+    '''
+    
+    root, timeframe = job
+    row = {'plant': os.path.basename(os.path.normpath(root)), 'timeframe': timeframe, 'month_avail_scb': None,
+           'month_avail_inv': None, 'irr_gain': None, 'status': 'ok', 'seconds': None}
+    start = time.perf_counter()
+    try:
+        calc = Availability(row['plant'], timeframe, cache_dir=cache_dir, root_path=root, dtype=dtype, verbose=verbose)
+        calc.availability_calc(report=report, backend=backend, include_raw=include_raw)
+        row.update(month_avail_scb=calc.month_avail_scb, month_avail_inv=calc.month_avail_inv, irr_gain=calc.irr_gain)
+    except Exception:
+        row['status'] = 'error: ' + traceback.format_exc(limit=1).strip().splitlines()[-1]
+    row['seconds'] = time.perf_counter() - start
+    
+    return row
+
+
+def run_batch(jobs, workers=None, cache_dir=None, report=True, backend='xlsx', include_raw=True, dtype='float64',
+              verbose=True):
+    '''
+    Parameters
+    ----------
+    jobs : List of tuples (plant root, timeframe) as returned by function find_jobs
+    workers : Integer, optional. The default is None, meaning as many workers as processors. Number of worker 
+              processes; with 1 worker, the jobs are run one after the other in the current process
+    cache_dir : String, optional. The default is None. Folder of the cache of cleaned .csv data
+    report : Boolean, optional. The default is True. Whether to create the output report of each job
+    backend : String, optional. The default is 'xlsx'. Format of the output reports; refer to function write_report
+    include_raw : Boolean, optional. The default is True. Whether the output reports include the raw data sheets
+    dtype : String, optional. The default is 'float64'. Data type of the measurements; refer to class Availability
+    verbose : Boolean, optional. The default is True. Whether the calculation of each job prints its warnings and
+              results; the worker processes print them as they go, mixed with those of the other jobs
+
+    Returns
+    -------
+    summary : Pandas Dataframe with one row per plant-month, as returned by function run_job
+
+    '''
+    
+    if workers == 1:
+        rows = [run_job(job, cache_dir, report, backend, include_raw, dtype, verbose) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_job, job, cache_dir, report, backend, include_raw, dtype, verbose)
+                       for job in jobs]
+            rows = []
+            for job, future in zip(jobs, futures):
+                # run_job already catches the errors of the calculation; this only happens if the worker dies
+                try:
+                    rows.append(future.result())
+                except Exception as error:
+                    rows.append({'plant': os.path.basename(os.path.normpath(job[0])), 'timeframe': job[1],
+                                 'status': 'error: ' + repr(error)})
+                    
+    return pd.DataFrame(rows, columns=['plant', 'timeframe', 'month_avail_scb', 'month_avail_inv', 'irr_gain',
+                                       'status', 'seconds'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time based availability calculation of several projects and months')
+    parser.add_argument('--plants', nargs='+', default=['.'], help="project folders or glob patterns, e.g. 'Plants/*'")
+    parser.add_argument('--timeframes', nargs='+', required=True, help="timeframes or glob patterns, e.g. '2020_*'")
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes (1 runs serially)")
+    parser.add_argument('--cache-dir', default=None, help="folder where the cleaned .csv data is cached between runs")
+    parser.add_argument('--no-report', action='store_true', help="do not create the report of each job")
+    parser.add_argument('--format', default='xlsx', choices=BACKENDS, help="format of the report of each job")
+    parser.add_argument('--no-raw', action='store_true', help="do not include the raw data sheets in the reports")
+    parser.add_argument('--dtype', default='float64', choices=['float64', 'float32'],
+                        help="data type of the measurements; float32 halves their memory")
+    parser.add_argument('--verbose', action='store_true', help="print the warnings and results of every job")
+    parser.add_argument('--output', default='Availability Summary.csv', help="summary table .csv file")
+    parser.add_argument('--compare-serial', action='store_true', help="also run the jobs serially and compare times")
+    args = parser.parse_args()
+    
+    jobs = find_jobs(args.plants, args.timeframes)
+    start = time.perf_counter()
+    summary = run_batch(jobs, args.workers, args.cache_dir, not args.no_report, args.format, not args.no_raw,
+                        args.dtype, args.verbose)
+    elapsed = time.perf_counter() - start
+    summary.to_csv(args.output, index=False)
+    print(summary.to_string(index=False))
+    print('{} jobs, {} failed, {:.2f} s with {} workers'.format(len(jobs), (summary['status'] != 'ok').sum(), elapsed,
+                                                               args.workers or os.cpu_count()))
+    
+    if args.compare_serial:
+        start = time.perf_counter()
+        run_batch(jobs, 1, args.cache_dir, not args.no_report, args.format, not args.no_raw, args.dtype, args.verbose)
+        serial = time.perf_counter() - start
+        print('{:.2f} s serially, speedup {:.2f}x'.format(serial, serial / elapsed))
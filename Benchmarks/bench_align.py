@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Time and memory of the alignment of the sources on a time grid against the legacy inner-join merges.
+"""
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.Align_Data import align_frames
+
+
+def synthetic_sources(n_time, n_inv, n_scb_per_inv, gaps=0, seed=0):
+    '''
+    Returns the meteo, string box groups and inverter dataframes of a plant with 5-minute records, as read from the
+    .csv files; each group of string boxes misses a fraction gaps of the records
+
+    '''
+
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2020-10-01', periods=n_time, freq='5min', name='Date', unit='ns')
+    met = pd.DataFrame(rng.random((n_time, 5)) * 1000, index=index,
+                       columns=['RAD_' + str(i) + ' [W/m2]' for i in range(1, 6)])
+    scb_dict = {'INV-{:02d}'.format(i + 1): pd.DataFrame(rng.random((n_time, n_scb_per_inv)) * 40, index=index,
+                                                        columns=['SCB {}-{:02d}'.format(i + 1, j + 1)
+                                                                 for j in range(n_scb_per_inv)])
+                for i in range(n_inv)}
+    scb_dict = {key: df[rng.random(n_time) >= gaps] for key, df in scb_dict.items()}
+    inv = pd.DataFrame(rng.random((n_time, n_inv)) * 1000, index=index,
+                       columns=['INV ' + str(i + 1) for i in range(n_inv)])
+
+    return met, scb_dict, inv
+
+
+def legacy_assembly(met, scb_dict, inv):
+    '''
+    Former assembly of the data: the groups of string boxes are merged one by one into SCB_df, as function
+    read_SCB_data did, and the output dataframe is built with a merge for each group and for each block of results,
+    as method Availability.availability_calc did; the results are stood in by the input data of the same shape
+
+    '''
+
+    scb_df = pd.DataFrame(index=scb_dict[list(scb_dict)[0]].index)
+    for key in scb_dict:
+        scb_df = scb_df.merge(scb_dict[key], left_index=True, right_index=True)
+
+    output_df = pd.DataFrame(index=met.index)
+    for key in scb_dict:
+        output_df = output_df.merge(scb_dict[key], left_index=True, right_index=True)
+    for item in [met.iloc[:, 0], met.iloc[:, 1], met.iloc[:, 2], met.iloc[:, 3], met.iloc[:, 4], inv,
+                 inv.add_prefix('Am '), inv.add_prefix('COM ')]:
+        output_df = output_df.merge(item, left_index=True, right_index=True)
+
+    return scb_df, output_df
+
+
+def aligned_assembly(met, scb_dict, inv):
+    '''
+    Current assembly of the data: all sources are aligned on a common time grid in a single pass with function
+    align_frames, and the output dataframe is built with a single concat
+
+    '''
+
+    aligned, report = align_frames({'MET': met, 'SCB': scb_dict, 'INV': inv})
+    (scb_df, scb_dict), met, inv = aligned['SCB'], aligned['MET'], aligned['INV']
+    output_df = pd.concat(list(scb_dict.values()) + [met, inv, inv.add_prefix('Am '), inv.add_prefix('COM ')], axis=1)
+
+    return scb_df, output_df
+
+
+def measure(function, *args):
+    '''
+    Returns the seconds and the peak of memory allocated (MiB) while calling function with args, and the number of
+    rows of the output dataframe
+
+    '''
+
+    start = time.perf_counter()
+    output_df = function(*args)[1]
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+
+    return seconds, peak, len(output_df)
+
+
+def bench_align(sizes=((8928, 10, 12, 0), (8928, 40, 24, 0), (8928, 80, 24, 0), (44640, 40, 24, 0),
+                       (44640, 80, 24, 0), (8928, 80, 24, 0.01), (44640, 80, 24, 0.01))):
+    '''
+    Parameters
+    ----------
+    sizes : Tuple of tuples (timestamps, inverters, string boxes per inverter, fraction of records missing in each
+            group of string boxes) to be benchmarked
+
+    Returns
+    -------
+    results : Pandas Dataframe with the seconds, the peak memory and the rows kept by both assemblies on each size
+
+    '''
+
+    results = []
+    for n_time, n_inv, n_scb_per_inv, gaps in sizes:
+        sources = synthetic_sources(n_time, n_inv, n_scb_per_inv, gaps)
+        row = {'timestamps': n_time, 'SCBs': n_inv * n_scb_per_inv, 'gaps': gaps}
+        row['merge [s]'], row['merge [MiB]'], row['merge rows'] = measure(legacy_assembly, *sources)
+        row['align [s]'], row['align [MiB]'], row['align rows'] = measure(aligned_assembly, *sources)
+        row['speedup'] = row['merge [s]'] / row['align [s]']
+        results.append(row)
+
+    return pd.DataFrame(results)
+
+
+if __name__ == '__main__':
+    print(bench_align().round(2).to_string(index=False))
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Reading time of a project folder without cache, with a cold cache and with a warm cache.
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Met_Data.Read_Met_Data import read_met_data as met
+from SCB_Data.Read_SCB_Data import read_SCB_data as scb
+from INV_Data.Read_Inv_Data import read_inv_data as inv
+from Common.Cache_Data import DataCache
+
+
+def read_all(timeframe, cache):
+    start = time.perf_counter()
+    met('Met_Data', timeframe, cache=cache)
+    scb('SCB_Data', timeframe, cache=cache)
+    inv('INV_Data', timeframe, cache=cache)
+    
+    return time.perf_counter() - start
+
+
+def bench_cache(root, timeframe):
+    '''
+    Parameters
+    ----------
+    root : String with the path of the project folder that contains the 'Met_Data', 'SCB_Data' and 'INV_Data' folders
+    timeframe : String name of the timeframe subfolder to be read, e.g. '2020_09'
+
+    Returns
+    -------
+    times : Dictionary with the seconds spent reading the three folders without cache, with an empty cache (cold)
+            and with a populated cache (warm)
+
+    '''
+    
+    cwd, cache_dir = os.getcwd(), tempfile.mkdtemp()
+    os.chdir(root) # the readers look for the data folders in the current working directory
+    try:
+        times = {'no cache': read_all(timeframe, None),
+                 'cold': read_all(timeframe, DataCache(cache_dir)),
+                 'warm': read_all(timeframe, DataCache(cache_dir))}
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(cache_dir)
+        
+    return times
+
+
+if __name__ == '__main__':
+    for run, seconds in bench_cache(sys.argv[1], sys.argv[2]).items():
+        print('{:<10}{:8.3f} s'.format(run, seconds))
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Time of the vectorized availability kernel against the legacy calculation, on synthetic arrays.
+"""
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.Availability_Kernel import availability_kernel, availability_kpis
+
+
+def synthetic_arrays(n_time, n_inv, n_scb_per_inv, seed=0):
+    rng = np.random.default_rng(seed)
+    sun = np.clip(np.sin(np.linspace(0, 2 * np.pi * n_time / 24, n_time)), 0, None)[:, None]
+    rad = sun * 900 * (1 + 0.05 * rng.standard_normal((n_time, 5)))
+    scb = sun * 40 * (rng.random((n_time, n_inv * n_scb_per_inv)) > 0.05)
+    inv = sun * 1000 * (rng.random((n_time, n_inv)) > 0.02)
+    
+    return rad, scb, inv
+
+
+def legacy_calc(rad, scb, inv, n_inv, n_scb_per_inv):
+    '''
+    Former column by column calculation of method Availability.availability_calc on pandas dataframes, kept as 
+    reference for the benchmark; returns the availabilities at string box and inverter levels
+    
+    '''
+    
+    index = pd.date_range('2020-01-01', periods=len(rad), freq='min')
+    met = pd.DataFrame(rad, index=index, columns=['RAD_' + str(i) + ' [W/m2]' for i in range(1, 6)])
+    scb_dict = {key: pd.DataFrame(scb[:, key * n_scb_per_inv:(key + 1) * n_scb_per_inv], index=index,
+                                  columns=['SCB ' + str(key + 1) + '-' + str(j) for j in range(n_scb_per_inv)])
+                for key in range(n_inv)}
+    inv_data = pd.DataFrame(inv, index=index)
+    
+    avail_df = pd.DataFrame(index=index)
+    avail_df['HGPOAm'] = np.where(met[['RAD_3 [W/m2]', 'RAD_4 [W/m2]', 'RAD_5 [W/m2]']].mean(axis=1) > 300, 1, 0)
+    avail_scb = {}
+    for key in scb_dict:
+        avail_scb[key] = pd.DataFrame(index=index)
+        for col in scb_dict[key].columns:
+            avail_scb[key][col] = np.where((scb_dict[key][col] > 5) & (avail_df['HGPOAm'] == 1), 1, 0)
+    avail_inv = pd.DataFrame(index=index)
+    for col in inv_data.columns:
+        avail_inv['HPm-I' + str(inv_data.columns.get_loc(col) + 1)] = \
+            np.where(((inv_data[col] > 0) | (inv_data[col].isnull())) & (avail_df['HGPOAm'] == 1), 1, 0)
+    inv_comms = pd.DataFrame(index=index)
+    for i in range(1, n_inv + 1):
+        inv_comms['COM-I' + str(i)] = 0
+    avail_scb_per_inv = pd.DataFrame(index=index)
+    for i, key in enumerate(avail_scb, start=1):
+        avail_scb_per_inv['Am-I' + str(i)] = np.where(avail_df['HGPOAm'] == 1, 
+                                                     np.where(inv_comms['COM-I' + str(i)] == 0, 
+                                                              avail_scb[key].sum(axis=1),
+                                                              avail_inv['HPm-I' + str(i)] * len(avail_scb[key].columns)), 0)
+    avail_df['HPm'] = avail_scb_per_inv.sum(axis=1) / scb.shape[1]
+    avail_df['HPm-I'] = avail_inv.sum(axis=1) / n_inv
+    
+    return (avail_df['HPm'].sum(axis=0) / avail_df['HGPOAm'].sum(axis=0), 
+            avail_df['HPm-I'].sum(axis=0) / avail_df['HGPOAm'].sum(axis=0))
+
+
+def bench_kernel(sizes=((744, 10, 12), (8760, 10, 12), (44640, 10, 12), (44640, 20, 24), (44640, 40, 24)),
+                 legacy=True):
+    '''
+    Parameters
+    ----------
+    sizes : Tuple of tuples (timestamps, inverters, string boxes per inverter) to be benchmarked
+    legacy : Boolean, optional. The default is True. Whether to time the former calculation as well
+
+    Returns
+    -------
+    results : Pandas Dataframe with the seconds spent by each method on each size
+
+    '''
+    
+    results = []
+    for n_time, n_inv, n_scb_per_inv in sizes:
+        rad, scb, inv = synthetic_arrays(n_time, n_inv, n_scb_per_inv)
+        scb_inv = np.repeat(np.arange(n_inv), n_scb_per_inv)
+        start = time.perf_counter()
+        kpis = availability_kpis(availability_kernel(rad[:, 2:], rad[:, :2], scb, scb_inv, inv,
+                                                     np.zeros(inv.shape, dtype=bool)))
+        row = {'timestamps': n_time, 'SCBs': scb.shape[1], 'kernel [s]': time.perf_counter() - start}
+        if legacy:
+            start = time.perf_counter()
+            assert np.allclose(legacy_calc(rad, scb, inv, n_inv, n_scb_per_inv), kpis[:2], rtol=1e-12)
+            row['legacy [s]'] = time.perf_counter() - start
+            row['speedup'] = row['legacy [s]'] / row['kernel [s]']
+        results.append(row)
+        
+    return pd.DataFrame(results)
+
+
+if __name__ == '__main__':
+    print(bench_kernel().to_string(index=False))
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Memory of every stage of the calculation with float64 and float32 measurements, and tolerance check of the float32
+results against the float64 ones. The .csv values have 3 decimals and float32 keeps 24 bits of mantissa, so values
+below 10^4 are rounded by less than 0.001; a flag only changes when a value is that close to its threshold (300 W/m2
+for the irradiance, 5 kW for the string boxes, 0 kW for the inverters), and the KPIs change by the weight of those
+timestamps. The check fails when the results differ by more than TOLERANCES.
+"""
+import os
+import sys
+import json
+import tempfile
+import contextlib
+import subprocess
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Largest differences accepted between float32 and float64 results: absolute for the KPIs and the irradiations
+# (kWh/m2 of each timestamp) and as a fraction of the values for the flags
+TOLERANCES = {'kpis': 1e-5, 'irradiation': 1e-5, 'flags': 1e-4}
+FLAGS = ['HGPOAm', 'avail_scb', 'avail_inv']
+
+
+def run_dtype(root, timeframe, dtype, out_file):
+    '''
+    Runs the calculation of root/timeframe with measurements of type dtype, profiling the memory of every stage with
+    tracemalloc, and saves the flags, irradiations and KPIs to the .npz file out_file; meant to be run in a fresh
+    process
+
+    Returns
+    -------
+    stages : List of dictionaries of the stages, as returned by method RunProfiler.report
+
+    '''
+
+    from Availability_Calc import Availability
+    from Common.Profile_Run import RunProfiler
+
+    profiler = RunProfiler(memory='tracemalloc')
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        calc = Availability('Bench', timeframe, root_path=root, profiler=profiler, dtype=dtype)
+        calc.availability_calc(backend='parquet')
+    for file in calc.report_files:
+        os.remove(file)
+
+    np.savez(out_file, kpis=[calc.month_avail_scb, calc.month_avail_inv, calc.irr_gain],
+             HGPOAm=calc.avail_df['HGPOAm'].to_numpy(), avail_scb=calc.output_df[calc.scb_data.columns].to_numpy(),
+             avail_inv=calc.avail_inv.to_numpy(), GPOAI=calc.avail_df['GPOAI'].to_numpy(),
+             GHI=calc.avail_df['GHI'].to_numpy())
+
+    return profiler.report()['stages']
+
+
+def tolerance_check(file64, file32):
+    '''
+    Parameters
+    ----------
+    file64, file32 : Strings with the .npz files saved by function run_dtype with float64 and float32 measurements
+
+    Returns
+    -------
+    check : Dictionary with the largest difference of the KPIs and irradiations, the fraction of flags that differ,
+            and whether all of them are within TOLERANCES
+
+    '''
+
+    with np.load(file64) as ref, np.load(file32) as new:
+        check = {'kpis': float(np.nanmax(np.abs(ref['kpis'] - new['kpis']))),
+                 'irradiation': float(max(np.nanmax(np.abs(ref[col] - new[col]), initial=0) for col in
+                                          ['GPOAI', 'GHI'])),
+                 'flags': float(max((ref[col] != new[col]).mean() if ref[col].size else 0 for col in FLAGS))}
+    check['passed'] = all(check[key] <= tolerance for key, tolerance in TOLERANCES.items())
+
+    return check
+
+
+def bench_memory(root, timeframe):
+    '''
+    Parameters
+    ----------
+    root : String with the path of the project folder that contains the 'Met_Data', 'SCB_Data' and 'INV_Data' folders
+    timeframe : String name of the timeframe subfolder to be read, e.g. '2020_09'
+
+    Returns
+    -------
+    stages : Pandas Dataframe with the peak memory allocated by every stage (MiB above the memory in use when it
+             started) and the memory in use after it, with float64 and float32 measurements, each run in its own
+             process
+    check : Dictionary returned by function tolerance_check
+
+    '''
+
+    out_dir = tempfile.mkdtemp()
+    stages = {}
+    for dtype in ['float64', 'float32']:
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', root, timeframe, dtype,
+                              os.path.join(out_dir, dtype + '.npz')], capture_output=True, text=True, check=True)
+        stages[dtype] = pd.DataFrame(json.loads(out.stdout)).set_index('name')[['delta_mib', 'retained_mib']]
+    check = tolerance_check(os.path.join(out_dir, 'float64.npz'), os.path.join(out_dir, 'float32.npz'))
+
+    stages = pd.concat(stages, axis=1)
+    for col in ['delta_mib', 'retained_mib']:
+        stages[('reduction', col)] = 1 - stages[('float32', col)] / stages[('float64', col)]
+
+    return stages, check
+
+
+if __name__ == '__main__':
+    if sys.argv[1] == '--child':
+        print(json.dumps(run_dtype(*sys.argv[2:6])))
+    else:
+        stages, check = bench_memory(sys.argv[1], sys.argv[2])
+        print(stages.round(3).to_string())
+        print(json.dumps(check))
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Reading time of the shared .csv loader against the legacy readers.
+"""
+import os
+import sys
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.Read_Csv_Data import read_scada_csv
+
+
+def legacy_read(file_name):
+    '''
+    Parameters
+    ----------
+    file_name : String with the full path of a SCADA .csv export
+
+    Returns
+    -------
+    df : Pandas Dataframe read with the former per-folder method (python engine with a regex delimiter, quotes
+         replaced in all the dataframe and dates rebuilt from strings), kept as reference for the benchmark
+
+    '''
+    
+    col_names = pd.read_csv(file_name, delimiter=';', skiprows=1).columns
+    df = pd.read_csv(file_name, engine='python', delimiter='\;', skiprows=2)
+    df = getattr(df, 'applymap', df.map)(lambda x: x.replace('"', ''))
+    df.columns = col_names
+    for col in df.columns[1:]:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    date = df[df.columns[0]].apply(lambda x: x.split()[0].split('/'))
+    df['Date'] = pd.to_datetime(date.str[2] + '-' + date.str[1] + '-' + date.str[0] + ' ' + 
+                                df[df.columns[0]].apply(lambda x: x.split()[1]))
+    df.set_index('Date', inplace=True)
+    del df[df.columns[0]]
+    
+    return df
+
+
+def bench_readers(root, timeframe, repeat=3):
+    '''
+    Parameters
+    ----------
+    root : String with the path of the project folder that contains the 'Met_Data', 'SCB_Data' and 'INV_Data' folders
+    timeframe : String name of the timeframe subfolder to be read, e.g. '2020_09'
+    repeat : Integer, optional. The default is 3. Number of times each file is read; the best time is kept
+
+    Returns
+    -------
+    results : Pandas Dataframe with the rows per second achieved by each method on all the .csv files of the timeframe
+
+    '''
+    
+    files = [os.path.join(root, folder, timeframe, file) for folder in ['Met_Data', 'SCB_Data', 'INV_Data']
+             for file in sorted(os.listdir(os.path.join(root, folder, timeframe))) if file.endswith('csv')]
+    
+    results = {}
+    for name, reader in [('legacy', legacy_read), ('shared', read_scada_csv),
+                         ('shared_float32', lambda f: read_scada_csv(f, dtype='float32'))]:
+        rows, best = 0, 0.
+        for file in files:
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                df = reader(file)
+                times.append(time.perf_counter() - start)
+            rows += len(df)
+            best += min(times)
+        results[name] = {'rows': rows, 'seconds': best, 'rows/sec': rows / best}
+        
+    results = pd.DataFrame(results).T
+    results['speedup'] = results.loc['legacy', 'seconds'] / results['seconds']
+    
+    return results
+
+
+if __name__ == '__main__':
+    print(bench_readers(sys.argv[1], sys.argv[2]).to_string())
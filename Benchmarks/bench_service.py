@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Latency of Availability_Service.py under concurrent load, with a stub client that posts requests from several
+threads: first a burst of identical requests of a plant-month that is not in memory yet, which must be coalesced
+into a single load, and then recalculations with random inverters without communications during random intervals.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import urllib.error
+import urllib.request
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Availability_Service import AvailabilityService, make_server
+
+
+def post(url, payload, timeout=600):
+    '''
+    Parameters
+    ----------
+    url : String, e.g. 'http://127.0.0.1:8080/availability'
+    payload : Dictionary sent as JSON
+    timeout : Float, optional. The default is 600. Seconds to wait for the response
+
+    Returns
+    -------
+    status : Integer HTTP status of the response
+    body : Dictionary of the JSON response
+    seconds : Float, elapsed seconds from sending the request to reading the response
+
+    '''
+
+    request = urllib.request.Request(url, json.dumps(payload).encode(), {'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            status, body = response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        status, body = error.code, json.loads(error.read())
+
+    return status, body, time.perf_counter() - start
+
+
+def load_test(url, payloads, concurrency=8):
+    '''
+    Parameters
+    ----------
+    url : String of the endpoint to post to
+    payloads : List of dictionaries, one per request
+    concurrency : Integer, optional. The default is 8. Number of clients posting at the same time
+
+    Returns
+    -------
+    results : Pandas Dataframe with the status, the seconds and the source of the dataset of every request
+    seconds : Float, elapsed seconds of the whole test
+
+    '''
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        responses = list(clients.map(lambda payload: post(url, payload), payloads))
+    seconds = time.perf_counter() - start
+
+    return pd.DataFrame([{'status': status, 'seconds': elapsed, 'dataset': body.get('dataset')}
+                         for status, body, elapsed in responses]), seconds
+
+
+def latency(results, seconds):
+    # Percentiles of the latency of the requests, in milliseconds, and requests per second
+    return {'requests': len(results), 'errors': int((results['status'] != 200).sum()),
+            'p50 [ms]': 1000 * np.percentile(results['seconds'], 50),
+            'p99 [ms]': 1000 * np.percentile(results['seconds'], 99),
+            'max [ms]': 1000 * results['seconds'].max(), 'req/s': len(results) / seconds}
+
+
+def random_payloads(plant, timeframe, inverters, n_requests, seed=0):
+    '''
+    Returns
+    -------
+    payloads : List of n_requests dictionaries, each of them with up to 3 of the inverters without communications
+               during a random interval of the timeframe
+
+    '''
+
+    rng = np.random.default_rng(seed)
+    month = pd.Timestamp(timeframe.replace('_', '-') + '-01')
+    payloads = []
+    for _ in range(n_requests):
+        start = month + pd.Timedelta(hours=int(rng.integers(0, 24 * 27)))
+        elements = list(rng.choice(inverters, size=int(rng.integers(1, 4)), replace=False))
+        payloads.append({'plant': plant, 'timeframe': timeframe, 'scb_no_comm': elements,
+                         'interv_no_comm': [[str(start), str(start + pd.Timedelta(hours=int(rng.integers(1, 48))))]]})
+
+    return payloads
+
+
+def bench_service(plants_dir, plant, timeframe, concurrency=8, n_requests=200, workers=None, tables=True):
+    '''
+    Parameters
+    ----------
+    plants_dir : String with the folder of the plants served
+    plant : String, subfolder of plants_dir of the plant requested
+    timeframe : String, timeframe requested, e.g. '2020_10'
+    concurrency : Integer, optional. The default is 8. Number of clients posting at the same time
+    n_requests : Integer, optional. The default is 200. Number of recalculations of the second phase
+    workers : Integer, optional. The default is None. Workers of the service
+    tables : Boolean, optional. The default is True. Whether the responses include the table of every inverter
+
+    Returns
+    -------
+    results : Pandas Dataframe with the latency of the burst of identical requests of a plant-month not in memory,
+              and of the recalculations once in memory
+    stats : Dictionary of the counters of the service after both phases
+
+    '''
+
+    service = AvailabilityService(plants_dir, workers)
+    server = make_server(service, port=0, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = 'http://{}:{}/availability'.format(*server.server_address[:2])
+
+    try:
+        burst = load_test(url, [{'plant': plant, 'timeframe': timeframe, 'tables': tables}] * concurrency, concurrency)
+        status, body, _ = post(url, {'plant': plant, 'timeframe': timeframe})
+        if status != 200:
+            raise RuntimeError(body['error'])
+        inverters = [row['inverter'] for row in body['inverters']]
+        payloads = [dict(payload, tables=tables) for payload in random_payloads(plant, timeframe, inverters, n_requests)]
+        warm = load_test(url, payloads, concurrency)
+        stats = service.stats()
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+    return pd.DataFrame({'cold burst': latency(*burst), 'warm recalculations': latency(*warm)}).T, stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Latency of the availability service under concurrent load')
+    parser.add_argument('plants_dir', help="folder with a subfolder per plant")
+    parser.add_argument('plant', help="subfolder of the plant requested")
+    parser.add_argument('timeframe', help="timeframe requested, e.g. '2020_10'")
+    parser.add_argument('--concurrency', type=int, default=8, help="clients posting at the same time")
+    parser.add_argument('--requests', type=int, default=200, help="number of recalculations")
+    parser.add_argument('--workers', type=int, default=None, help="workers of the service")
+    parser.add_argument('--no-tables', action='store_true', help="do not ask for the table of every inverter")
+    args = parser.parse_args()
+
+    results, stats = bench_service(args.plants_dir, args.plant, args.timeframe, args.concurrency, args.requests,
+                                   args.workers, not args.no_tables)
+    print(results.round(1).to_string())
+    print(json.dumps(stats))
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Cold start of the command line against the jobs of a warm worker: the import of Availability_Calc and the --help of
+the command line in a fresh process, a whole calculation in a fresh process per job, and the same job sent to a
+worker of Availability_Worker.py that is already running. The reports are written as parquet files without the raw
+data sheets to the project folder, overwriting them on every job, and deleted at the end unless they were there
+before the benchmark.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import numpy as np
+import pandas as pd
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cold_start(command, cwd=REPO, repeat=5):
+    '''
+    Parameters
+    ----------
+    command : List of strings with the command to run in a fresh process
+    cwd : String, optional. The default is the folder of the repository. Working directory of the process
+    repeat : Integer, optional. The default is 5. Number of runs
+
+    Returns
+    -------
+    seconds : 1-D numpy array with the elapsed seconds of each run, from the start of the process to its end
+
+    '''
+
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, check=True, stdout=subprocess.DEVNULL)
+        seconds.append(time.perf_counter() - start)
+
+    return np.array(seconds)
+
+
+def warm_jobs(root, timeframe, repeat=5):
+    '''
+    Parameters
+    ----------
+    root : String with the path of the project folder that contains the 'Met_Data', 'SCB_Data' and 'INV_Data' folders
+    timeframe : String name of the timeframe subfolder to be read, e.g. '2020_09'
+    repeat : Integer, optional. The default is 5. Number of jobs timed, after a first job that is not timed
+
+    Returns
+    -------
+    seconds : 1-D numpy array with the elapsed seconds of each job, from sending it to the worker to reading its result
+
+    '''
+
+    worker = subprocess.Popen([sys.executable, os.path.join(REPO, 'Availability_Worker.py'), '--format', 'parquet',
+                               '--no-raw'], cwd=REPO, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, text=True, bufsize=1)
+    job = json.dumps({'root': root, 'timeframe': timeframe}) + '\n'
+    seconds = []
+    try:
+        for i in range(repeat + 1):
+            start = time.perf_counter()
+            worker.stdin.write(job)
+            result = json.loads(worker.stdout.readline())
+            if result['status'] != 'ok':
+                raise RuntimeError(result['status'])
+            if i:
+                seconds.append(time.perf_counter() - start)
+    finally:
+        worker.stdin.close()
+        worker.wait()
+
+    return np.array(seconds)
+
+
+def bench_startup(root, timeframe, repeat=5):
+    '''
+    Returns
+    -------
+    results : Pandas Dataframe with the median and minimum seconds of the import, the --help, the calculation in a
+              fresh process and the calculation in a warm worker, for the project folder root and timeframe
+
+    '''
+
+    script = os.path.join(REPO, 'Availability_Calc.py')
+    # The cold jobs are named 'Bench' and the jobs of the worker take the name of the project folder
+    reports = [os.path.join(root, 'Availability Calc - {} - {} - AVA.parquet'.format(name, timeframe))
+               for name in {'Bench', os.path.basename(os.path.normpath(root))}]
+    reports = [file for file in reports if not os.path.exists(file)]
+    try:
+        results = {'import Availability_Calc': cold_start([sys.executable, '-c', 'import Availability_Calc'],
+                                                          repeat=repeat),
+                   'Availability_Calc.py --help': cold_start([sys.executable, script, '--help'], repeat=repeat),
+                   'cold job (new process)': cold_start([sys.executable, script, 'Bench', timeframe, '--format',
+                                                         'parquet', '--no-raw'], cwd=root, repeat=repeat),
+                   'warm job (worker)': warm_jobs(root, timeframe, repeat)}
+    finally:
+        for file in reports:
+            if os.path.exists(file):
+                os.remove(file)
+
+    return pd.DataFrame({'median [s]': {key: np.median(value) for key, value in results.items()},
+                         'min [s]': {key: value.min() for key, value in results.items()}})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cold start of the command line against a warm worker')
+    parser.add_argument('root', help="project folder with the 'Met_Data', 'SCB_Data' and 'INV_Data' folders")
+    parser.add_argument('timeframe', help="timeframe subfolder to read, e.g. '2020_10'")
+    parser.add_argument('--repeat', type=int, default=5, help="number of runs of each measurement")
+    args = parser.parse_args()
+
+    print(bench_startup(os.path.abspath(args.root), args.timeframe, args.repeat).round(3).to_string())
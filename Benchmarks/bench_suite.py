@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite of the whole calculation on synthetic plants of several sizes.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import datetime
+import subprocess
+import contextlib
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Benchmarks.synthetic_scada import generate_plant
+
+# Plants benchmarked, from a month of hourly records to a year of 1-minute records of 600 string boxes; the scenarios
+# that do not fit in memory are run in streaming mode, in which the reading and the calculation are not separable
+# and no report is written
+SCENARIOS = {
+    'month-1h-120': dict(plant=dict(n_inv=10, scb_per_inv=12, freq='1h'), mode='full', backend='xlsx'),
+    'month-5min-480': dict(plant=dict(n_inv=20, scb_per_inv=24, freq='5min'), mode='full', backend='parquet'),
+    'month-1min-600': dict(plant=dict(n_inv=25, scb_per_inv=24, freq='1min'), mode='full', backend='parquet'),
+    'year-1min-600': dict(plant=dict(n_inv=25, scb_per_inv=24, freq='1min', days=365), mode='stream',
+                          chunk_rows=20000),
+}
+TIMEFRAME = '2020_01'
+
+
+def scenario_data(name, data_dir):
+    '''
+    Parameters
+    ----------
+    name : String key of SCENARIOS
+    data_dir : String with the folder where the synthetic plants are kept between runs
+
+    Returns
+    -------
+    root : String with the project folder of the scenario, generated unless it already exists with the same
+           parameters
+
+    '''
+
+    root = os.path.join(data_dir, name)
+    params = dict(SCENARIOS[name]['plant'], timeframe=TIMEFRAME, missing=0.001, gaps=0.0005)
+    marker = os.path.join(root, 'plant.json')
+    if os.path.exists(marker):
+        with open(marker) as f:
+            if {key: value for key, value in json.load(f).items() if key in params} == params:
+                return root
+    shutil.rmtree(root, ignore_errors=True)
+    info = generate_plant(root, **params)
+    with open(marker, 'w') as f:
+        json.dump(info, f)
+
+    return root
+
+
+def run_scenario(name, root, backend=None):
+    '''
+    Runs the scenario name on the plant of folder root; meant to be run in a fresh process, so that the peak memory
+    is caused by this scenario only
+
+    Returns
+    -------
+    result : Dictionary with the seconds and peak resident memory (MiB) of the reading (including the alignment), the
+             calculation and the writing of the report, and the size of the plant
+
+    '''
+
+    from Common.Profile_Run import RunProfiler
+
+    scenario = SCENARIOS[name]
+    with open(os.path.join(root, 'plant.json')) as f:
+        plant = json.load(f)
+    result = {'scenario': name, 'mode': scenario['mode'], 'records': plant['records'], 'SCBs': plant['SCBs'],
+              'csv_mib': plant['size_mib']}
+    profiler = RunProfiler(memory='rss', scenario=name)
+
+    if scenario['mode'] == 'stream':
+        from Availability_Streaming import stream_availability
+        with profiler.stage('read+calc'):
+            stream_availability(TIMEFRAME, root, chunk_rows=scenario['chunk_rows'])
+    else:
+        from Availability_Calc import Availability
+        with contextlib.redirect_stdout(open(os.devnull, 'w')):
+            calc = Availability('Bench', TIMEFRAME, root_path=root, profiler=profiler)
+            calc.availability_calc(backend=backend or scenario['backend'])
+        for file in calc.report_files:
+            os.remove(file)
+
+    # The stages of the profiler are added up in the three phases of the run
+    stages = pd.DataFrame(profiler.report()['stages'])
+    phases = {'read': ('read_', 'align'), 'calc': ('availability_calc',), 'write': ('write_report',),
+              'read+calc': ('read+calc',)}
+    for phase, prefixes in phases.items():
+        selected = stages[stages['name'].str.startswith(prefixes)]
+        if len(selected):
+            result[phase + ' [s]'] = selected['seconds'].sum()
+            result[phase + ' [MiB]'] = selected['peak_mib'].max()
+    result['max RSS [MiB]'] = profiler.report()['run']['max_rss_mib']
+
+    return result
+
+
+def git_commit():
+    # Commit of the working tree benchmarked, to track the results over time
+    out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    return out.stdout.strip() or None
+
+
+def bench_suite(names, data_dir, backend=None, history=None):
+    '''
+    Parameters
+    ----------
+    names : List of strings, keys of SCENARIOS to run
+    data_dir : String with the folder where the synthetic plants are generated and kept between runs
+    backend : String, optional. The default is None. Format of the reports written; when None, the one of each
+              scenario
+    history : String, optional. The default is None. Path of a .jsonl file to which the results are appended, one
+              line per scenario, with the commit and the date of the run
+
+    Returns
+    -------
+    results : Pandas Dataframe with the result of each scenario, each run in its own process
+
+    '''
+
+    results = []
+    for name in names:
+        root = scenario_data(name, data_dir)
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', name, root, str(backend)],
+                             capture_output=True, text=True)
+        if out.returncode:
+            results.append({'scenario': name, 'error': out.stderr.strip()[-200:]})
+        else:
+            results.append(json.loads(out.stdout))
+
+    if history:
+        run = {'commit': git_commit(), 'date': datetime.datetime.now().isoformat(timespec='seconds')}
+        with open(history, 'a') as f:
+            for result in results:
+                f.write(json.dumps(dict(run, **result)) + '\n')
+
+    return pd.DataFrame(results)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        print(json.dumps(run_scenario(sys.argv[2], sys.argv[3], None if sys.argv[4] == 'None' else sys.argv[4])))
+    else:
+        parser = argparse.ArgumentParser(description='Benchmarks reading, calculation and writing on synthetic plants')
+        parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS)[:3], choices=list(SCENARIOS),
+                            help="scenarios to run; all but the year of 1-minute records by default")
+        parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'Availability_Bench_Data'),
+                            help="folder where the synthetic plants are kept between runs")
+        parser.add_argument('--format', default=None, help="format of the reports, instead of that of each scenario")
+        parser.add_argument('--history', default=None, help=".jsonl file to which the results are appended")
+        args = parser.parse_args()
+
+        start = time.perf_counter()
+        print(bench_suite(args.scenarios, args.data_dir, args.format, args.history).round(2).to_string(index=False))
+        print('{:.0f} s'.format(time.perf_counter() - start))
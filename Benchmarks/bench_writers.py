@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Time and memory of every backend of the report writer.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import resource
+import tempfile
+import subprocess
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.Write_Report import BACKENDS
+
+
+def current_rss():
+    # Resident memory of the process in MiB, read from /proc on Linux
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2 ** 20
+
+
+def bench_backend(root, timeframe, backend, include_raw):
+    '''
+    Runs the calculation of root/timeframe without report and then times the writing of the report with backend;
+    meant to be run in a fresh process, so that the peak RSS of the process is caused by this backend only
+
+    '''
+    
+    from Availability_Calc import Availability
+    from Common.Write_Report import write_report
+    
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        calc = Availability('Bench', timeframe, root_path=root)
+        calc.availability_calc(report=False)
+    sheets = {'RAW_SCB': calc.scb_data, 'RAW_MET': calc.met_data, 'RAW_INV': calc.inv_data, 'AVA': calc.output_df}
+    
+    out_dir = tempfile.mkdtemp()
+    rss_before = current_rss()
+    start = time.perf_counter()
+    files = write_report(os.path.join(out_dir, 'Bench'), sheets, backend=backend, include_raw=include_raw)
+    seconds = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    size = sum(os.path.getsize(file) for file in files)
+    shutil.rmtree(out_dir)
+    
+    return {'backend': backend, 'raw sheets': include_raw, 'seconds': seconds, 'RSS before [MiB]': rss_before,
+            'peak RSS [MiB]': peak, 'size [MiB]': size / 2 ** 20}
+
+
+def bench_writers(root, timeframe):
+    '''
+    Parameters
+    ----------
+    root : String with the path of the project folder that contains the 'Met_Data', 'SCB_Data' and 'INV_Data' folders
+    timeframe : String name of the timeframe subfolder to be read, e.g. '2020_09'
+
+    Returns
+    -------
+    results : List of dictionaries with the write time, resident memory before writing, peak resident memory and 
+              size of the output of each backend, with and without raw sheets, each measured in its own process
+
+    '''
+    
+    results = []
+    for backend in BACKENDS:
+        for include_raw in [True, False]:
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', root, timeframe, backend,
+                                  str(include_raw)], capture_output=True, text=True)
+            if out.returncode:
+                results.append({'backend': backend, 'raw sheets': include_raw, 'error': out.stderr.strip()[-200:]})
+            else:
+                results.append(json.loads(out.stdout))
+                
+    return results
+
+
+if __name__ == '__main__':
+    if sys.argv[1] == '--child':
+        print(json.dumps(bench_backend(sys.argv[2], sys.argv[3], sys.argv[4], sys.argv[5] == 'True')))
+    else:
+        import pandas as pd
+        print(pd.DataFrame(bench_writers(sys.argv[1], sys.argv[2])).to_string(index=False))
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Generator of synthetic SCADA exports with the layout expected by the readers, to benchmark the calculation at any
+plant size. A project folder holds three folders, each with a subfolder per timeframe (e.g. '2020_10'):
+
+    Met_Data/<timeframe>/Report Met.csv          5 pyranometers: RAD_1 and RAD_2 horizontal, RAD_3 to RAD_5 inclined
+    INV_Data/<timeframe>/Report INV.csv          active power of every inverter (kW)
+    SCB_Data/<timeframe>/Report SCB INV-01.csv   active power of the string boxes of inverter 1 (kW), and so on
+
+The meteo and inverter file names contain 'Report' and the string box file names contain 'SCB', the characters
+11 to 17 of their name ('INV-01') naming the group of string boxes; the groups are read in name order, so the n-th
+file belongs to the n-th inverter. Every file has the same layout:
+
+    "Report";"<project name>"                    title line, its last field being the project name
+    "Timestamp";"SCB 1-01";"SCB 1-02";...        column names, the first one being the date and time column
+    "";"[kW]";"[kW]";...                         units line, which is not data
+    "01/10/2020 00:00";"0.000";"";...            records: ';' separated and '"' quoted, stamps 'DD/MM/YYYY HH:MM',
+                                                 missing values left empty
+"""
+import os
+import csv
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 100000
+
+
+def timeframe_index(timeframe, freq='1h', days=None):
+    '''
+    Parameters
+    ----------
+    timeframe : String with structure 'YYYY_MM', e.g. '2020_10'
+    freq : String, optional. The default is '1h'. Sampling interval of the records, e.g. '5min'
+    days : Integer, optional. The default is None. Number of days of records from the first day of the timeframe;
+           when None, the whole month
+
+    Returns
+    -------
+    index : Pandas DatetimeIndex with the timestamps of the records
+
+    '''
+
+    start = pd.Timestamp(timeframe.replace('_', '-') + '-01')
+    end = start + (pd.Timedelta(days=days) if days else pd.offsets.MonthBegin(1))
+
+    return pd.date_range(start, end, freq=freq, inclusive='left', name='Date', unit='ns')
+
+
+def irradiance(index, rng, latitude=40, cloud_steps=12):
+    '''
+    Parameters
+    ----------
+    index : Pandas DatetimeIndex with the timestamps of the records
+    rng : Numpy random Generator
+    latitude : Float, optional. The default is 40. Latitude of the plant in degrees
+    cloud_steps : Integer, optional. The default is 12. Number of records over which the clouds change
+
+    Returns
+    -------
+    ghi : 1-D numpy array with the global horizontal irradiance (W/m2) of a clear sky dimmed by passing clouds
+    gain : 1-D numpy array with the ratio of the irradiance on the one-axis trackers to the horizontal irradiance
+
+    '''
+
+    # Solar elevation from the day of the year and the hour, and clouds as smoothed noise of the sky clearness
+    day = index.dayofyear.to_numpy()
+    hour = index.hour.to_numpy() + index.minute.to_numpy() / 60
+    declination = np.radians(23.44) * np.sin(2 * np.pi * (284 + day) / 365)
+    lat = np.radians(latitude)
+    sin_elevation = np.sin(lat) * np.sin(declination) + np.cos(lat) * np.cos(declination) * \
+                    np.cos(np.radians(15 * (hour - 12)))
+    sin_elevation = np.clip(sin_elevation, 0, None)
+    clouds = np.convolve(rng.standard_normal(len(index)), np.ones(cloud_steps) / np.sqrt(cloud_steps), 'same')
+    clearness = np.clip(0.8 + 0.2 * clouds, 0.1, 1)
+    ghi = 1100 * sin_elevation ** 1.15 * clearness
+    gain = np.where(sin_elevation > 0.05, 1 + 0.35 * (1 - sin_elevation), 1)
+
+    return ghi, gain
+
+
+def outages(shape, rng, rate, mean_steps):
+    '''
+    Parameters
+    ----------
+    shape : Tuple (records, elements)
+    rng : Numpy random Generator
+    rate : Float, probability of an element starting an outage in each record
+    mean_steps : Float, mean number of records that an outage lasts
+
+    Returns
+    -------
+    down : 2-D numpy array of booleans, True for the records in which each element is out of service
+
+    '''
+
+    down = np.zeros(shape, dtype=bool)
+    starts = np.argwhere(rng.random(shape) < rate)
+    lengths = rng.geometric(1 / mean_steps, len(starts))
+    for (row, col), length in zip(starts, lengths):
+        down[row:row + length, col] = True
+
+    return down
+
+
+def write_scada_csv(file_name, project_name, col_names, units, index, values, missing=0.0, gaps=0.0, rng=None):
+    '''
+    Parameters
+    ----------
+    file_name : String with the full path of the .csv file to write
+    project_name : String written as last field of the title line
+    col_names : List of strings with the names of the columns of values
+    units : String with the units of the columns of values, e.g. '[kW]'
+    index : Pandas DatetimeIndex with the timestamps of the records
+    values : 2-D numpy array (records x columns) of floats
+    missing : Float, optional. The default is 0. Fraction of values left empty
+    gaps : Float, optional. The default is 0. Fraction of records left out of the file
+    rng : Numpy random Generator, optional. The default is None. Generator of the missing values and records
+
+    Returns
+    -------
+    size : Integer size of the file in bytes
+
+    '''
+
+    rng = rng or np.random.default_rng(0)
+    os.makedirs(os.path.dirname(file_name), exist_ok=True)
+    with open(file_name, 'w', newline='') as f:
+        writer = csv.writer(f, delimiter=';', quotechar='"', quoting=csv.QUOTE_ALL, lineterminator='\n')
+        writer.writerow(['Report', project_name])
+        writer.writerow(['Timestamp'] + list(col_names))
+        writer.writerow([''] + [units] * len(col_names))
+        # The records are written by chunks, so that only one chunk is formatted as text at a time
+        for start in range(0, len(index), CHUNK_ROWS):
+            chunk = pd.DataFrame(values[start:start + CHUNK_ROWS], index=index[start:start + CHUNK_ROWS], copy=True)
+            if missing:
+                chunk = chunk.mask(rng.random(chunk.shape) < missing)
+            if gaps:
+                chunk = chunk[rng.random(len(chunk)) >= gaps]
+            chunk.to_csv(f, sep=';', header=False, quoting=csv.QUOTE_ALL, float_format='%.3f', na_rep='',
+                         date_format='%d/%m/%Y %H:%M', lineterminator='\n')
+
+    return os.path.getsize(file_name)
+
+
+def generate_plant(root, timeframe='2020_10', n_inv=10, scb_per_inv=12, freq='1h', days=None, missing=0.0, gaps=0.0,
+                   seed=0, project_name='Synthetic'):
+    '''
+    Parameters
+    ----------
+    root : String with the path of the project folder where the 'Met_Data', 'SCB_Data' and 'INV_Data' folders are
+           written
+    timeframe : String, optional. The default is '2020_10'. Timeframe with structure 'YYYY_MM'
+    n_inv : Integer, optional. The default is 10. Number of inverters
+    scb_per_inv : Integer, optional. The default is 12. Number of string boxes of each inverter
+    freq : String, optional. The default is '1h'. Sampling interval of the records, e.g. '5min'
+    days : Integer, optional. The default is None. Number of days of records; when None, the whole month
+    missing : Float, optional. The default is 0. Fraction of values left empty in every file
+    gaps : Float, optional. The default is 0. Fraction of records left out of every file
+    seed : Integer, optional. The default is 0. Seed of the random values
+    project_name : String, optional. The default is 'Synthetic'. Project name written in the title lines
+
+    Returns
+    -------
+    info : Dictionary with the parameters of the plant, the number of records and columns and the size of the files
+
+    '''
+
+    rng = np.random.default_rng(seed)
+    index = timeframe_index(timeframe, freq, days)
+    steps_per_hour = pd.Timedelta('1h') / pd.Timedelta(freq)
+    ghi, gain = irradiance(index, rng, cloud_steps=max(int(steps_per_hour), 1))
+    size = 0
+
+    # Five pyranometers with a small calibration error each: two horizontal and three on the trackers
+    pyranometers = np.column_stack([ghi * (1 + 0.01 * rng.standard_normal()) for _ in range(2)] +
+                                   [ghi * gain * (1 + 0.01 * rng.standard_normal()) for _ in range(3)])
+    size += write_scada_csv(os.path.join(root, 'Met_Data', timeframe, 'Report Met.csv'), project_name,
+                            ['Pyranometer ' + str(i) for i in range(1, 6)], '[W/m2]', index, pyranometers, missing,
+                            gaps, rng)
+
+    # Every string box produces about 40 kW at 1000 W/m2 on the trackers, except during its outages and those of its
+    # inverter, which happen a few times a month and last some hours
+    poa = ghi * gain / 1000
+    inv_down = outages((len(index), n_inv), rng, 1 / (30 * 24 * steps_per_hour), 4 * steps_per_hour)
+    inv_power = np.zeros((len(index), n_inv))
+    for inv in range(n_inv):
+        scb_down = outages((len(index), scb_per_inv), rng, 2 / (30 * 24 * steps_per_hour), 6 * steps_per_hour)
+        scb_power = poa[:, None] * 40 * (1 + 0.03 * rng.standard_normal(scb_per_inv)) * ~scb_down
+        scb_power[inv_down[:, inv]] = 0
+        inv_power[:, inv] = scb_power.sum(axis=1) * 0.98
+        size += write_scada_csv(os.path.join(root, 'SCB_Data', timeframe, 'Report SCB INV-{:02d}.csv'.format(inv + 1)),
+                                project_name, ['SCB {}-{:02d}'.format(inv + 1, scb + 1) for scb in range(scb_per_inv)],
+                                '[kW]', index, scb_power, missing, gaps, rng)
+
+    size += write_scada_csv(os.path.join(root, 'INV_Data', timeframe, 'Report INV.csv'), project_name,
+                            ['INV ' + str(inv + 1) for inv in range(n_inv)], '[kW]', index, inv_power, missing, gaps,
+                            rng)
+
+    return {'timeframe': timeframe, 'n_inv': n_inv, 'scb_per_inv': scb_per_inv, 'freq': freq, 'days': days,
+            'missing': missing, 'gaps': gaps, 'seed': seed, 'records': len(index), 'SCBs': n_inv * scb_per_inv,
+            'size_mib': size / 2 ** 20}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Writes synthetic SCADA exports of a solar PV project')
+    parser.add_argument('root', help="project folder where 'Met_Data', 'SCB_Data' and 'INV_Data' are written")
+    parser.add_argument('timeframe', nargs='?', default='2020_10', help="timeframe with structure 'YYYY_MM'")
+    parser.add_argument('--inverters', type=int, default=10, help="number of inverters")
+    parser.add_argument('--scb-per-inv', type=int, default=12, help="number of string boxes of each inverter")
+    parser.add_argument('--freq', default='1h', help="sampling interval, e.g. '1h', '5min' or '1min'")
+    parser.add_argument('--days', type=int, default=None, help="number of days of records; the whole month by default")
+    parser.add_argument('--missing', type=float, default=0.0, help="fraction of values left empty")
+    parser.add_argument('--gaps', type=float, default=0.0, help="fraction of records left out of the files")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the random values")
+    args = parser.parse_args()
+
+    print(json.dumps(generate_plant(args.root, args.timeframe, args.inverters, args.scb_per_inv, args.freq, args.days,
+                                    args.missing, args.gaps, args.seed)))
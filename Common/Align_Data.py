@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+Alignment of the meteo, string box and inverter data on one regular time grid, with a report of the
+records of every source that are missing, repeated or off the grid.
+"""
+import numpy as np
+import pandas as pd
+from Common.Outage_Intervals import interval_mask, merge_intervals
+
+REPORT_COLUMNS = ['source', 'issue', 'start', 'end', 'records']
+
+
+def infer_step(indexes):
+    '''
+    Parameters
+    ----------
+    indexes : List of Pandas DatetimeIndex, one for each source of data
+
+    Returns
+    -------
+    step : Integer number of nanoseconds between consecutive timestamps that is most common in the sources, or None
+           when no source has two different timestamps
+
+    '''
+
+    # I count the steps of every source separately, so that sources logged with an offset between them (e.g. the
+    # meteo station at :00 and the inverters at :02) do not make up a shorter step; consecutive sources with the
+    # same timestamps, like the groups of string boxes, are counted once
+    counts, previous = {}, None
+    for index in indexes:
+        if previous is not None and index.equals(previous):
+            continue
+        previous = index
+        steps = np.diff(index.asi8 if index.is_monotonic_increasing else np.sort(index.asi8))
+        for step, count in zip(*np.unique(steps[steps > 0], return_counts=True)):
+            counts[int(step)] = counts.get(int(step), 0) + int(count)
+
+    return max(counts, key=counts.get) if counts else None
+
+
+def timeframe_bounds(timeframe):
+    '''
+    Parameters
+    ----------
+    timeframe : String name of the timeframe subfolder, e.g. '2020_10'
+
+    Returns
+    -------
+    start, end : Pandas Timestamps of the first instant of the month and of the next month when timeframe has
+                 structure 'YYYY_MM'; None, None otherwise
+
+    '''
+
+    if len(timeframe) != 7 or timeframe[4] != '_' or not (timeframe[:4] + timeframe[5:]).isdigit() or \
+       not 1 <= int(timeframe[5:]) <= 12:
+        return None, None
+    start = pd.Timestamp(year=int(timeframe[:4]), month=int(timeframe[5:]), day=1)
+
+    return start, start + pd.DateOffset(months=1)
+
+
+def time_grid(indexes, freq=None, start=None, end=None):
+    '''
+    Parameters
+    ----------
+    indexes : List of Pandas DatetimeIndex, one for each source of data
+    freq : String or Timedelta, optional. The default is None. Step of the grid, e.g. '5min'; when None, the most
+           common step between consecutive timestamps of the sources is used
+    start, end : Timestamps, optional. The default is None. Bounds of the timeframe, end excluded, e.g. those given by
+                 function timeframe_bounds; the grid is extended back to start and on up to end, so that the records
+                 missing at the beginning or at the end of the timeframe in all the sources are reported as missing.
+                 The grid is never cut to the bounds: the records out of them are kept
+
+    Returns
+    -------
+    grid : Pandas DatetimeIndex named 'Date' with a regular step, from the first to the last timestamp of all sources
+           or of the bounds; the timestamps of the grid are those of the data shifted by whole steps, so they keep
+           the offset of the data within the step (e.g. :02 for data logged 2 minutes past each 5 minutes)
+
+    '''
+
+    indexes = [pd.DatetimeIndex(index, dtype='datetime64[ns]') for index in indexes]
+    stamps = [index for index in indexes if len(index)]
+    if not stamps:
+        return pd.DatetimeIndex([], dtype='datetime64[ns]', name='Date')
+
+    first, last = min(index.min() for index in stamps).value, max(index.max() for index in stamps).value
+    step = pd.Timedelta(freq).value if freq is not None else infer_step(stamps)
+    if step is None:
+        return pd.DatetimeIndex([first], dtype='datetime64[ns]', name='Date')
+    if start is not None and pd.Timestamp(start).value < first:
+        first -= step * ((first - pd.Timestamp(start).value) // step)
+    if end is not None and pd.Timestamp(end).value > last:
+        last += step * ((pd.Timestamp(end).value - 1 - last) // step)
+
+    return pd.DatetimeIndex(first + step * np.arange((last - first) // step + 1), dtype='datetime64[ns]', name='Date')
+
+
+def runs(mask):
+    '''
+    Parameters
+    ----------
+    mask : 1-D numpy array of booleans
+
+    Returns
+    -------
+    starts, ends : 1-D numpy arrays of integers with the first and last positions of each run of True values
+
+    '''
+
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+
+
+def source_issues(source, index, grid, positions, on_grid, first):
+    '''
+    Parameters
+    ----------
+    source : String name of the source of data
+    index : Pandas DatetimeIndex of the source
+    grid : Pandas DatetimeIndex returned by function time_grid
+    positions : 1-D numpy array of integers with the position in grid of each timestamp of index
+    on_grid : 1-D numpy array of booleans, False for the timestamps of index that fall between two grid timestamps
+    first : 1-D numpy array of booleans, False for the timestamps of index that repeat a previous timestamp
+
+    Returns
+    -------
+    issues : List of dictionaries with keys REPORT_COLUMNS, one for each interval of missing timestamps, each run of
+             duplicated timestamps and each timestamp out of the grid
+
+    '''
+
+    issues = []
+    present = np.zeros(len(grid), dtype=bool)
+    present[positions[on_grid]] = True
+    repeated = np.bincount(positions[on_grid & ~first], minlength=len(grid))
+    for issue, counts in [('missing', (~present).astype(np.int64)), ('duplicate', repeated)]:
+        total = np.concatenate(([0], np.cumsum(counts)))
+        for start, end in zip(*runs(counts > 0)):
+            issues.append({'source': source, 'issue': issue, 'start': grid[start], 'end': grid[end],
+                           'records': int(total[end + 1] - total[start])})
+    for stamp in index[~on_grid]:
+        issues.append({'source': source, 'issue': 'off_grid', 'start': stamp, 'end': stamp, 'records': 1})
+
+    return issues
+
+
+def align_frames(frames, freq=None, start=None, end=None):
+    '''
+    Parameters
+    ----------
+    frames : Dictionary of sources of data, each one being a Pandas Dataframe with a datetime index or a dictionary
+             of such dataframes (e.g. the groups of string boxes of function read_SCB_data)
+    freq : String or Timedelta, optional. The default is None. Step of the grid; refer to function time_grid
+    start, end : Timestamps, optional. The default is None. Bounds of the timeframe the grid is extended to; refer to
+                 function time_grid
+
+    Returns
+    -------
+    aligned : Dictionary with the same keys as frames, all the dataframes being reindexed on the same regular time
+              grid, with NaN values for the timestamps missing in each source; a dictionary of dataframes is returned
+              as a tuple (dataframe with all their columns, dictionary of dataframes), like function read_SCB_data
+    report : Pandas Dataframe with columns 'source', 'issue', 'start', 'end' and 'records' listing the intervals of
+             timestamps of the grid missing in each source ('missing'), the repeated timestamps, of which only the
+             first record is kept ('duplicate'), and the timestamps that do not fall on the grid, which are left out
+             ('off_grid')
+
+    '''
+
+    # I flatten the sources to build the grid from all of their timestamps
+    sources = {}
+    for key, frame in frames.items():
+        for group, df in (frame.items() if isinstance(frame, dict) else [(None, frame)]):
+            sources[(key, group)] = df
+
+    grid = time_grid([df.index for df in sources.values()], freq, start, end)
+    step = (grid[1] - grid[0]).value if len(grid) > 1 else 1
+    origin = grid[0].value if len(grid) else 0
+
+    # The grid position of every timestamp is computed arithmetically from the regular step instead of joining on
+    # the timestamps, and only once for the sources that share the same timestamps; a source that already has every
+    # timestamp of the grid once is taken as it is, without copying its data, and the rest are written in a single
+    # pass at the grid positions of their timestamps
+    issues, stamps = [], None
+    for (key, group), df in sources.items():
+        if stamps is None or not df.index.equals(stamps):
+            stamps = pd.DatetimeIndex(df.index, dtype='datetime64[ns]')
+            positions, remainder = np.divmod(stamps.asi8 - origin, step)
+            on_grid = (remainder == 0) & (positions >= 0) & (positions < len(grid))
+            if stamps.is_monotonic_increasing:
+                first = np.concatenate(([True], np.diff(stamps.asi8) != 0))[:len(stamps)]
+            else:
+                first = ~stamps.duplicated(keep='first')
+            exact = len(stamps) == len(grid) and on_grid.all() and np.array_equal(positions, np.arange(len(grid)))
+        if exact:
+            sources[(key, group)] = df.set_axis(grid, axis=0)
+            continue
+        keep = on_grid & first
+        values = np.full((len(grid), df.shape[1]), np.nan, dtype=np.result_type(*df.dtypes, np.float16))
+        values[positions[keep]] = df.to_numpy(dtype=values.dtype)[keep]
+        sources[(key, group)] = pd.DataFrame(values, index=grid, columns=df.columns, copy=False)
+        issues += source_issues(key if group is None else key + ' ' + str(group), stamps, grid, positions, on_grid,
+                                first)
+
+    # The groups of a dictionary are put side by side with a single concat
+    aligned = {}
+    for key, frame in frames.items():
+        if isinstance(frame, dict):
+            block = {group: sources[(key, group)] for group in frame}
+            aligned[key] = (pd.concat(list(block.values()), axis=1) if block else pd.DataFrame(index=grid), block)
+        else:
+            aligned[key] = sources[(key, None)]
+
+    return aligned, pd.DataFrame(issues, columns=REPORT_COLUMNS)
+
+
+def complete_mask(grid, report):
+    '''
+    Parameters
+    ----------
+    grid : Pandas DatetimeIndex of the aligned data
+    report : Pandas Dataframe returned by function align_frames
+
+    Returns
+    -------
+    mask : 1-D numpy array of booleans, True for the timestamps of grid that are present in all the sources
+
+    '''
+
+    missing = report[report['issue'] == 'missing']
+
+    return ~interval_mask(grid, *merge_intervals(missing['start'], missing['end']))
+
+
+def report_summary(report):
+    '''
+    Parameters
+    ----------
+    report : Pandas Dataframe returned by function align_frames
+
+    Returns
+    -------
+    lines : List of strings, one for each source and issue, with the number of records affected
+
+    '''
+
+    totals = report.groupby(['source', 'issue'], sort=False)['records'].agg(['sum', 'size'])
+
+    return ['{} {} timestamps in {} ({} intervals)'.format(row['sum'], issue.replace('_', ' '), source, row['size'])
+            for (source, issue), row in totals.iterrows()]
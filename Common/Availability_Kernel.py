@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized availability kernel over the matrix of string boxes, and the exact KPIs from its results or from
+running totals.
+"""
+import math
+import numpy as np
+from fractions import Fraction
+
+
+def row_mean(values):
+    '''
+    Parameters
+    ----------
+    values : 2-D numpy array of floats
+
+    Returns
+    -------
+    mean : 1-D numpy array with the mean of each row skipping NaN values, NaN if all values of the row are NaN
+
+    '''
+    
+    valid = ~np.isnan(values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(valid, values, 0).sum(axis=1) / valid.sum(axis=1)
+
+
+def group_sum(values, groups, n_groups):
+    '''
+    Parameters
+    ----------
+    values : 2-D numpy array (timestamps x string boxes) of booleans or numbers
+    groups : 1-D numpy array of integers with the group (inverter position) each column of values belongs to
+    n_groups : Integer number of groups
+
+    Returns
+    -------
+    sums : 2-D numpy array of integers (timestamps x groups) with the sum of the columns of each group
+
+    '''
+    
+    # I sum contiguous slices of columns, so I first sort the columns by group when they are not already sorted;
+    # empty groups keep a sum of 0
+    if np.any(np.diff(groups) < 0):
+        order = np.argsort(groups, kind='stable')
+        values, groups = values[:, order], groups[order]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    
+    # One slice at a time: np.add.reduceat casts the whole array of booleans to integers before summing it, which
+    # takes 8 times its memory
+    sums = np.zeros((values.shape[0], n_groups), dtype=np.int64)
+    for group in np.flatnonzero(counts):
+        values[:, starts[group]:starts[group] + counts[group]].sum(axis=1, dtype=np.int64, out=sums[:, group])
+    
+    return sums
+
+
+def availability_kernel(rad_incl, rad_horiz, scb_power, scb_inv, inv_power, no_comm, irr_threshold=300,
+                        scb_threshold=5, complete=None):
+    '''
+    Parameters
+    ----------
+    rad_incl : 2-D numpy array (timestamps x pyranometers) with the readings of the inclined pyranometers (W/m2)
+    rad_horiz : 2-D numpy array (timestamps x pyranometers) with the readings of the horizontal pyranometers (W/m2)
+    scb_power : 2-D numpy array (timestamps x string boxes) with the active power of the string boxes (kW)
+    scb_inv : 1-D numpy array of integers with the position of the inverter each string box belongs to
+    inv_power : 2-D numpy array (timestamps x inverters) with the active power of the inverters
+    no_comm : 2-D numpy array of booleans (timestamps x inverters), True when the string boxes of an inverter have
+              no communications
+    irr_threshold : Float, optional. The default is 300. Inclined irradiance (W/m2) above which the plant is 
+                    expected to produce
+    scb_threshold : Float, optional. The default is 5. Active power (kW) above which a string box is available
+    complete : 1-D numpy array of booleans, optional. The default is None. False for the timestamps missing in any
+               of the sources of data, which are neither counted in HGPOAm nor in the irradiation
+
+    Returns
+    -------
+    result : Dictionary of numpy arrays with the same calculations as method Availability.availability_calc:
+             'HGPOAm', 'GPOAI', 'GHI', 'HPm', 'Am' and 'HPm-I' (timestamps), 'avail_scb' (timestamps x string boxes),
+             'avail_inv' and 'inv_comms' (timestamps x inverters) and 'avail_scb_per_inv' (timestamps x inverters 
+             with string boxes)
+
+    '''
+    
+    n_scb, n_inv = scb_power.shape[1], inv_power.shape[1]
+    n_groups = int(scb_inv.max()) + 1 if n_scb else 0
+    if n_groups > n_inv:
+        raise ValueError('There are string boxes assigned to {} inverters but only {} inverters'.format(n_groups, n_inv))
+    
+    incl, horiz = row_mean(rad_incl), row_mean(rad_horiz)
+    if complete is not None:
+        incl[~complete], horiz[~complete] = np.nan, np.nan
+    hgpoam = incl > irr_threshold
+    
+    # Comparisons with NaN are False, so missing string box data is unavailable while missing inverter data is
+    # available
+    avail_scb = (scb_power > scb_threshold) & hgpoam[:, None]
+    avail_inv = ((inv_power > 0) | np.isnan(inv_power)) & hgpoam[:, None]
+    inv_comms = no_comm & hgpoam[:, None]
+    
+    # When the string boxes of an inverter have no communications, they are considered available if the inverter is
+    comms = inv_comms[:, :n_groups]
+    scb_per_inv = np.where(comms, avail_inv[:, :n_groups] * np.bincount(scb_inv, minlength=n_groups),
+                           group_sum(avail_scb, scb_inv, n_groups))
+    scb_per_inv[~hgpoam] = 0
+    
+    hpm = scb_per_inv.sum(axis=1) / n_scb
+    with np.errstate(invalid='ignore', divide='ignore'):
+        am = hpm / hgpoam
+    
+    return {'HGPOAm': hgpoam, 'GPOAI': incl / 1000, 'GHI': horiz / 1000, 'HPm': hpm, 'Am': am,
+            'HPm-I': avail_inv.sum(axis=1) / n_inv, 'avail_scb': avail_scb, 'avail_inv': avail_inv,
+            'inv_comms': inv_comms, 'avail_scb_per_inv': scb_per_inv}
+
+
+def availability_kpis(result):
+    '''
+    Parameters
+    ----------
+    result : Dictionary returned by function availability_kernel
+
+    Returns
+    -------
+    month_avail_scb : Float, availability of the project at string box level
+    month_avail_inv : Float, availability of the project at inverter level
+    irr_gain : Float, irradiation gain originated by the one-axis trackers
+
+    '''
+    
+    # The availabilities are calculated from integer counts and the irradiations with an exactly rounded sum, so the
+    # result does not depend on the order in which the timestamps are added
+    n_scb, n_inv = result['avail_scb'].shape[1], result['avail_inv'].shape[1]
+    
+    return kpis_from_totals(int(result['HGPOAm'].sum()), int(result['avail_scb_per_inv'].sum()), n_scb,
+                            int(result['avail_inv'].sum()), n_inv, math.fsum(result['GPOAI'][~np.isnan(result['GPOAI'])]),
+                            math.fsum(result['GHI'][~np.isnan(result['GHI'])]))
+
+
+def kpis_from_totals(hgpoam, scb_avail, n_scb, inv_avail, n_inv, gpoai, ghi):
+    '''
+    Parameters
+    ----------
+    hgpoam : Integer number of timestamps with irradiance above the threshold
+    scb_avail : Integer sum of the available string boxes of all timestamps
+    n_scb : Integer number of string boxes of the project
+    inv_avail : Integer sum of the available inverters of all timestamps
+    n_inv : Integer number of inverters of the project
+    gpoai : Float, global inclined irradiation (kWh/m2)
+    ghi : Float, global horizontal irradiation (kWh/m2)
+
+    Returns
+    -------
+    month_avail_scb, month_avail_inv, irr_gain : Floats as returned by function availability_kpis; NaN when the
+                                                 denominator is 0
+
+    '''
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (float(np.float64(scb_avail) / n_scb / hgpoam), float(np.float64(inv_avail) / n_inv / hgpoam),
+                float((np.float64(gpoai) - ghi) / ghi))
+
+
+def exact_sum(values):
+    '''
+    Parameters
+    ----------
+    values : 1-D numpy array of floats
+
+    Returns
+    -------
+    total : Fraction with the exact sum of the values that are not NaN, so that adding the sums of several batches
+            gives exactly the same result as adding all values at once
+
+    '''
+    
+    # Every float is an integer mantissa of 53 bits times a power of 2; I split the mantissas in two halves of 26 
+    # and 27 bits, so that the halves of the values with the same exponent can be added as int64 without overflow
+    values = np.asarray(values, dtype=np.float64)
+    mantissa, exponent = np.frexp(values[~np.isnan(values)])
+    mantissa = (mantissa * 2.0 ** 53).astype(np.int64)
+    order = np.argsort(exponent, kind='stable')
+    exponent = exponent[order]
+    starts = np.flatnonzero(np.diff(exponent, prepend=exponent[:1] - 1))
+    high = np.add.reduceat(mantissa[order] >> 26, starts) if len(starts) else []
+    low = np.add.reduceat(mantissa[order] & (2 ** 26 - 1), starts) if len(starts) else []
+    
+    total = Fraction(0)
+    for exp, hi, lo in zip(exponent[starts].tolist(), np.asarray(high).tolist(), np.asarray(low).tolist()):
+        total += Fraction((hi << 26) + lo) * Fraction(2) ** (exp - 53)
+        
+    return total
+
+
+class AvailabilityTotals:
+    
+    def __init__(self, totals=None):
+        '''
+        Parameters
+        ----------
+        totals : Dictionary, optional. The default is None. Totals returned by method to_dict, to continue adding
+                 batches of timestamps to them
+
+        '''
+        self.totals = totals or {'rows': 0, 'HGPOAm': 0, 'scb_avail': 0, 'inv_avail': 0, 'GPOAI': '0', 'GHI': '0',
+                                 'n_scb': 0, 'n_inv': 0, 'counters': None}
+        
+        
+    def add(self, result, scb_names, inv_names):
+        '''
+        Adds the contribution of a batch of timestamps to the running numerators and denominators of the
+        availabilities and irradiation gain, and to the counters of each string box and inverter
+
+        Parameters
+        ----------
+        result : Dictionary returned by function availability_kernel for the batch
+        scb_names : List of strings with the names of the string boxes (columns of result['avail_scb'])
+        inv_names : List of strings with the names of the inverters (columns of result['avail_inv'])
+
+        '''
+        
+        totals = self.totals
+        totals['rows'] += len(result['HGPOAm'])
+        totals['HGPOAm'] += int(result['HGPOAm'].sum())
+        totals['scb_avail'] += int(result['avail_scb_per_inv'].sum())
+        totals['inv_avail'] += int(result['avail_inv'].sum())
+        totals['GPOAI'] = str(Fraction(totals['GPOAI']) + exact_sum(result['GPOAI']))
+        totals['GHI'] = str(Fraction(totals['GHI']) + exact_sum(result['GHI']))
+        totals['n_scb'], totals['n_inv'] = len(scb_names), len(inv_names)
+        
+        names = {'avail_scb': scb_names, 'avail_inv': inv_names, 'inv_comms': inv_names,
+                 'avail_scb_per_inv': inv_names[:result['avail_scb_per_inv'].shape[1]]}
+        if totals['counters'] is None:
+            totals['counters'] = {key: dict.fromkeys(map(str, cols), 0) for key, cols in names.items()}
+        for key, cols in names.items():
+            for col, value in zip(map(str, cols), result[key].sum(axis=0).tolist()):
+                totals['counters'][key][col] += int(value)
+                
+                
+    def kpis(self):
+        '''
+        Returns
+        -------
+        month_avail_scb, month_avail_inv, irr_gain : Floats as returned by function availability_kpis; they are 
+                                                     exactly equal to those of all the timestamps added at once
+
+        '''
+        
+        totals = self.totals
+        
+        return kpis_from_totals(totals['HGPOAm'], totals['scb_avail'], totals['n_scb'], totals['inv_avail'],
+                                totals['n_inv'], float(Fraction(totals['GPOAI'])), float(Fraction(totals['GHI'])))
+    
+    
+    def to_dict(self):
+        # The totals only hold integers and strings, so they can be persisted as JSON
+        return self.totals
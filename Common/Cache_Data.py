@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+On-disk cache of the cleaned SCADA dataframes, keyed by the fingerprint of the .csv file they were read from.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+
+class DataCache:
+    
+    def __init__(self, cache_dir, max_bytes=2 * 1024 ** 3):
+        '''
+        Parameters
+        ----------
+        cache_dir : String with the path of the folder where the cleaned dataframes are stored; it is created
+                    if it does not exist
+        max_bytes : Integer, optional. The default is 2 GiB. Maximum size of the cache folder; when exceeded, the
+                    least recently used entries are deleted
+
+        '''
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        
+        
+    def fingerprint(self, file_name, **params):
+        '''
+        Parameters
+        ----------
+        file_name : String with the full path of the .csv file the cached dataframe is read from
+        **params : Any parameter of the reader that changes the cleaned dataframe (e.g. dtype or column names)
+
+        Returns
+        -------
+        key : String name of the cache entry, made of a hash of the file path and reader parameters followed by a
+              hash of the file size, modification time and content
+
+        '''
+        
+        file_name = os.path.abspath(file_name)
+        stat = os.stat(file_name)
+        content = hashlib.blake2b(digest_size=16)
+        with open(file_name, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                content.update(block)
+                
+        path_hash = hashlib.blake2b(json.dumps([file_name, params], sort_keys=True, default=str).encode(),
+                                    digest_size=8).hexdigest()
+        file_hash = hashlib.blake2b(json.dumps([stat.st_size, stat.st_mtime_ns, content.hexdigest()]).encode(),
+                                    digest_size=16).hexdigest()
+        
+        return path_hash + '-' + file_hash
+    
+    
+    def load(self, key):
+        '''
+        Parameters
+        ----------
+        key : String name of the cache entry returned by method fingerprint
+
+        Returns
+        -------
+        df : Pandas Dataframe stored under key, or None if the entry does not exist
+
+        '''
+        
+        entry = os.path.join(self.cache_dir, key + '.npz')
+        try:
+            with np.load(entry, allow_pickle=False) as data:
+                df = pd.DataFrame(data['values'], columns=data['columns'].tolist(),
+                                  index=pd.DatetimeIndex(data['index'], dtype='datetime64[ns]', name='Date'))
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            return None
+        
+        # The modification time of an entry records when it was last used; another process may have evicted it
+        # since it was read
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            pass
+        
+        return df
+    
+    
+    def store(self, key, df):
+        '''
+        Parameters
+        ----------
+        key : String name of the cache entry returned by method fingerprint
+        df : Pandas Dataframe with numeric columns of a single data type and a datetime index
+
+        '''
+        
+        # I write to a temporary file that is renamed at the end, so a concurrent reader never finds half an entry;
+        # a write that fails (e.g. a full disk) does not leave the temporary file behind
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, values=df.to_numpy(), columns=np.array(df.columns, dtype=str),
+                         index=df.index.to_numpy(dtype='datetime64[ns]'))
+            os.replace(tmp, os.path.join(self.cache_dir, key + '.npz'))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        
+        # Entries of a previous version of the same file can never be used again
+        path_hash = key.split('-')[0]
+        for entry in os.listdir(self.cache_dir):
+            if entry.startswith(path_hash + '-') and entry != key + '.npz':
+                try:
+                    os.remove(os.path.join(self.cache_dir, entry))
+                except FileNotFoundError:
+                    pass
+                
+        self.evict()
+        
+        
+    def evict(self):
+        '''
+        Deletes the least recently used entries until the size of the cache folder is below max_bytes; the entries
+        deleted meanwhile by another process sharing the folder are skipped
+        
+        '''
+        
+        entries = []
+        for entry in os.listdir(self.cache_dir):
+            if entry.endswith('.npz'):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, entry))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, os.path.join(self.cache_dir, entry)))
+        entries.sort()
+        size = sum(entry[1] for entry in entries)
+        while entries and size > self.max_bytes:
+            _, entry_size, entry = entries.pop(0)
+            size -= entry_size
+            try:
+                os.remove(entry)
+            except FileNotFoundError:
+                pass
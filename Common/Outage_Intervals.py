@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Communication outages as merged time intervals per inverter, turned into masks of the time index with
+searchsorted.
+"""
+import datetime
+import numpy as np
+import pandas as pd
+from Common.Read_Csv_Data import DATE_FORMAT
+
+# Formats of the days and times of the outage tickets that are not ISO 8601, day first as in the SCADA exports
+TICKET_FORMATS = [DATE_FORMAT, '%d/%m/%Y %H:%M:%S', '%d/%m/%Y']
+
+
+def element_inverter(element):
+    '''
+    Parameters
+    ----------
+    element : String name of a string box with structure "SCB I-N", or of an inverter with structure "INV I" or "I",
+              being I the inverter number
+
+    Returns
+    -------
+    inv : Integer inverter number I
+
+    '''
+    
+    words = str(element).split()
+    if words[0].upper() == 'SCB':
+        return int(words[1].split('-')[0])
+    
+    return int(words[-1])
+
+
+def merge_intervals(starts, ends):
+    '''
+    Parameters
+    ----------
+    starts : Array-like of datetimes with the start of each interval
+    ends : Array-like of datetimes with the end of each interval, both ends being included in the interval
+
+    Returns
+    -------
+    starts, ends : Numpy arrays of datetime64[ns] with the sorted and disjoint intervals covering the union of the
+                   given intervals
+
+    '''
+    
+    starts = pd.DatetimeIndex(starts, dtype='datetime64[ns]').to_numpy()
+    ends = pd.DatetimeIndex(ends, dtype='datetime64[ns]').to_numpy()
+    order = np.argsort(starts, kind='stable')
+    starts, ends = starts[order], np.maximum.accumulate(ends[order]) if len(ends) else ends
+    
+    # After sorting by start, an interval begins a new group when it starts after the furthest end seen so far; the
+    # end of each group is the furthest end of its last interval
+    new = np.ones(len(starts), dtype=bool)
+    new[1:] = starts[1:] > ends[:-1]
+    last = np.append(np.flatnonzero(new)[1:] - 1, len(starts) - 1) if len(starts) else np.array([], dtype=int)
+    
+    return starts[new], ends[last]
+
+
+def interval_mask(index, starts, ends):
+    '''
+    Parameters
+    ----------
+    index : Pandas DatetimeIndex of the data
+    starts, ends : Numpy arrays of datetime64[ns] with sorted and disjoint intervals, as returned by merge_intervals
+
+    Returns
+    -------
+    mask : 1-D numpy array of booleans, True for the timestamps of index within any interval (ends included)
+
+    '''
+    
+    if len(starts) == 0:
+        return np.zeros(len(index), dtype=bool)
+    
+    # For each timestamp I look for the last interval starting before it and check whether it has ended
+    stamps = pd.DatetimeIndex(index, dtype='datetime64[ns]').to_numpy()
+    last = np.searchsorted(starts, stamps, side='right') - 1
+    
+    return (last >= 0) & (stamps <= ends[np.maximum(last, 0)])
+
+
+def parse_ticket_dates(values):
+    '''
+    Parameters
+    ----------
+    values : Pandas Series of days and times: datetimes (e.g. Timestamps), which are kept as they are, or strings,
+             either ISO 8601 ('YYYY-MM-DD HH:MM', 'YYYY-MM-DD', ...) or day first as in the SCADA exports
+             ('DD/MM/YYYY HH:MM', 'DD/MM/YYYY HH:MM:SS' or 'DD/MM/YYYY')
+
+    Returns
+    -------
+    dates : Pandas Series of datetimes; a value that matches none of the formats raises ValueError, so that a day
+            is never taken for a month, whatever the form in which the tickets are given
+
+    '''
+    
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.astype('datetime64[ns]')
+    
+    dates = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    stamps = values.map(lambda value: isinstance(value, (datetime.date, np.datetime64))).to_numpy(dtype=bool)
+    if stamps.any():
+        dates[stamps] = pd.to_datetime(values[stamps].tolist())
+    values = values.astype(str).str.strip()
+    iso = values.str.match(r'\d{4}-').to_numpy() & ~stamps
+    if iso.any():
+        dates[iso] = pd.to_datetime(values[iso], format='ISO8601', errors='coerce')
+    for date_format in TICKET_FORMATS:
+        pending = ~iso & ~stamps & dates.isna().to_numpy()
+        if not pending.any():
+            break
+        dates[pending] = pd.to_datetime(values[pending], format=date_format, errors='coerce')
+    
+    if dates.isna().any():
+        raise ValueError('Outage ticket dates {} are neither ISO 8601 nor DD/MM/YYYY HH:MM'.format(
+            values[dates.isna()].tolist()[:5]))
+    
+    return dates
+
+
+def read_outage_tickets(file_name):
+    '''
+    Parameters
+    ----------
+    file_name : String with the path of a .csv file of outage tickets with columns 'element', 'start' and 'end'; 
+                'element' is a string box ("SCB I-N") or an inverter ("INV I"), and 'start' and 'end' are the first
+                and last day and time of the outage, day first as in the SCADA exports ('DD/MM/YYYY HH:MM') or ISO
+                8601 ('YYYY-MM-DD HH:MM'); refer to function parse_ticket_dates
+
+    Returns
+    -------
+    tickets : Pandas Dataframe with columns 'element', 'start' and 'end', the last two being datetimes
+
+    '''
+    
+    tickets = pd.read_csv(file_name, skipinitialspace=True)
+    tickets.columns = [col.strip().lower() for col in tickets.columns]
+    missing = {'element', 'start', 'end'} - set(tickets.columns)
+    if missing:
+        raise ValueError('Outage tickets file {} has no column {}'.format(file_name, sorted(missing)))
+    tickets['start'], tickets['end'] = parse_ticket_dates(tickets['start']), parse_ticket_dates(tickets['end'])
+    
+    return tickets[['element', 'start', 'end']]
+
+
+def as_tickets(tickets):
+    '''
+    Parameters
+    ----------
+    tickets : Outage tickets given as the path of a .csv file (refer to read_outage_tickets), a Pandas Dataframe with
+              columns 'element', 'start' and 'end', a dictionary {element: [(start, end), ...]} or None; the days and
+              times given as strings are parsed by function parse_ticket_dates in all cases
+
+    Returns
+    -------
+    tickets : Pandas Dataframe with columns 'element', 'start' and 'end'
+
+    '''
+    
+    if tickets is None:
+        return pd.DataFrame(columns=['element', 'start', 'end'])
+    if isinstance(tickets, str):
+        return read_outage_tickets(tickets)
+    if isinstance(tickets, dict):
+        tickets = pd.DataFrame([(element, start, end) for element, intervals in tickets.items()
+                                for start, end in intervals], columns=['element', 'start', 'end'])
+    else:
+        tickets = tickets[['element', 'start', 'end']].copy()
+    tickets['start'], tickets['end'] = parse_ticket_dates(tickets['start']), parse_ticket_dates(tickets['end'])
+    
+    return tickets
+
+
+def tickets_from_elements(elements, intervals):
+    '''
+    Parameters
+    ----------
+    elements : List of strings with the string boxes ("SCB I-N") or inverters ("INV I") without communications
+    intervals : List of tuples (start, end) with the intervals without communications of all the elements, parsed
+                by function parse_ticket_dates; when empty, the elements have no communications at any time
+
+    Returns
+    -------
+    tickets : Pandas Dataframe with columns 'element', 'start' and 'end', one row per element and interval
+
+    '''
+    
+    if not intervals:
+        intervals = [(pd.Timestamp.min, pd.Timestamp.max)]
+    tickets = pd.DataFrame([(element, start, end) for element in elements for start, end in intervals],
+                           columns=['element', 'start', 'end'])
+    tickets['start'], tickets['end'] = parse_ticket_dates(tickets['start']), parse_ticket_dates(tickets['end'])
+        
+    return tickets
+
+
+def outage_mask(index, tickets, n_inv, element_inv=None):
+    '''
+    Parameters
+    ----------
+    index : Pandas DatetimeIndex of the data
+    tickets : Outage tickets in any of the forms accepted by function as_tickets
+    n_inv : Integer number of inverters of the project
+    element_inv : Function, optional. The default is None, meaning function element_inverter. Function that gives
+                  the inverter number of an element, e.g. method PlantTopology.element_inverter
+
+    Returns
+    -------
+    mask : 2-D numpy array of booleans (timestamps x inverters), True when the string boxes of an inverter have no
+           communications; the tickets of the string boxes of an inverter apply to the whole inverter, and
+           overlapping tickets are merged
+
+    '''
+    
+    tickets = as_tickets(tickets)
+    mask = np.zeros((len(index), n_inv), dtype=bool)
+    if len(tickets) == 0:
+        return mask
+    
+    inv = tickets['element'].map(element_inv or element_inverter).to_numpy()
+    for number in np.unique(inv):
+        if 1 <= number <= n_inv:
+            mask[:, number - 1] = interval_mask(index, *merge_intervals(tickets['start'][inv == number],
+                                                                        tickets['end'][inv == number]))
+            
+    return mask
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+Topology of a plant: which pyranometers are inclined and horizontal, which inverter each string box belongs to, and
+the thresholds of the calculation. It is given by the optional file 'plant_topology.json' of the project folder, e.g.
+
+    {"irr_threshold": 250, "scb_threshold": 3,
+     "inclined": ["Pyranometer POA 1", "Pyranometer POA 2"], "horizontal": ["Pyranometer GHI"],
+     "scb_groups": {"INV-01": "INV A", "INV-02": "INV B"},
+     "scb_inverter": {"SCB 2-14": "INV A"}}
+
+The pyranometers are named as in the header of the meteo .csv file, or by position as 'RAD_1', 'RAD_2', etc.
+'scb_groups' assigns every group of string boxes (.csv file) to an inverter named as in the header of the inverter
+.csv file, and 'scb_inverter' reassigns single string boxes; without them, the n-th group belongs to the n-th
+inverter. The keys not given keep the values of DEFAULT_CONFIG, which are those of the original calculation.
+
+The configuration is checked against the headers of the .csv files, before the data is read, and compiled into
+arrays of column positions, so the calculation does not look up column names.
+"""
+import os
+import json
+import threading
+import numpy as np
+from collections import OrderedDict
+from Common.Read_Csv_Data import read_csv_header
+from Common.Outage_Intervals import element_inverter
+from Met_Data.Read_Met_Data import met_file
+from SCB_Data.Read_SCB_Data import scb_files
+from INV_Data.Read_Inv_Data import inv_file
+
+TOPOLOGY_FILE = 'plant_topology.json'
+DEFAULT_CONFIG = {'irr_threshold': 300, 'scb_threshold': 5, 'inclined': ['RAD_3', 'RAD_4', 'RAD_5'],
+                  'horizontal': ['RAD_1', 'RAD_2'], 'scb_groups': None, 'scb_inverter': {}}
+
+# Topologies already compiled, by configuration file and headers, the least recently used first; a plant-month is
+# compiled again only when any of them changes, and only the last MAX_COMPILED are kept, so a long-running service
+# does not keep every version of every plant-month
+MAX_COMPILED = 128
+COMPILED = OrderedDict()
+COMPILED_LOCK = threading.Lock()
+
+
+class TopologyError(ValueError):
+    pass
+
+
+def read_config(file_name=None):
+    '''
+    Parameters
+    ----------
+    file_name : String, optional. The default is None. Path of the .json configuration file; when None or when it
+                does not exist, the configuration is DEFAULT_CONFIG
+
+    Returns
+    -------
+    config : Dictionary with the keys of DEFAULT_CONFIG
+
+    '''
+
+    if not file_name or not os.path.exists(file_name):
+        return dict(DEFAULT_CONFIG)
+    with open(file_name) as f:
+        try:
+            config = json.load(f)
+        except ValueError as error:
+            raise TopologyError('{} is not valid JSON: {}'.format(file_name, error))
+
+    if not isinstance(config, dict):
+        raise TopologyError('{} must hold a JSON object'.format(file_name))
+    unknown = set(config) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise TopologyError('{} has unknown keys {}; the keys are {}'.format(file_name, sorted(unknown),
+                                                                            list(DEFAULT_CONFIG)))
+    config = dict(DEFAULT_CONFIG, **config)
+    for key in ['irr_threshold', 'scb_threshold']:
+        if isinstance(config[key], bool) or not isinstance(config[key], (int, float)):
+            raise TopologyError('{}: {} must be a number'.format(file_name, key))
+    for key in ['inclined', 'horizontal']:
+        if not config[key] or not isinstance(config[key], list) or \
+           not all(isinstance(name, str) for name in config[key]):
+            raise TopologyError('{}: {} must be a list of pyranometer names'.format(file_name, key))
+    for key in ['scb_groups', 'scb_inverter']:
+        if config[key] is not None and not isinstance(config[key], dict):
+            raise TopologyError('{}: {} must be an object'.format(file_name, key))
+
+    return config
+
+
+def read_headers(root_path, timeframe):
+    '''
+    Returns
+    -------
+    met_names : Tuple of strings with the names of the pyranometers in the header of the meteo .csv file
+    scb_groups : Tuple of tuples (group, tuple of the names of its string boxes), in the order they are read
+    inv_names : Tuple of strings with the names of the inverters in the header of the inverter .csv file
+
+    '''
+
+    # Only the first two lines of every file are read; the first column name is the date and time
+    met_names = tuple(read_csv_header(met_file(os.path.join(root_path, 'Met_Data'), timeframe))[1][1:])
+    scb_groups = tuple((key, tuple(read_csv_header(file_name)[1][1:])) for key, file_name in
+                       scb_files(os.path.join(root_path, 'SCB_Data'), timeframe).items())
+    inv_names = tuple(read_csv_header(inv_file(os.path.join(root_path, 'INV_Data'), timeframe))[1][1:])
+
+    return met_names, scb_groups, inv_names
+
+
+class PlantTopology:
+
+    def __init__(self, config, met_names, scb_groups, inv_names):
+        '''
+        Compiles config against the headers of the .csv files of a plant-month, raising TopologyError when they do
+        not match
+
+        Parameters
+        ----------
+        config : Dictionary returned by function read_config
+        met_names, scb_groups, inv_names : Headers of the .csv files, as returned by function read_headers
+
+        '''
+
+        self.irr_threshold, self.scb_threshold = config['irr_threshold'], config['scb_threshold']
+        self.inv_names = list(inv_names)
+        self.scb_names = [name for key, names in scb_groups for name in names]
+        inv_position = {name: i for i, name in enumerate(self.inv_names)}
+
+        # The pyranometers are taken by position from the meteo data, whose columns are named 'RAD_<position> [W/m2]'
+        positions = {name: i for i, name in enumerate(met_names)}
+        positions.update({'RAD_' + str(i + 1): i for i in range(len(met_names))})
+        positions.update({'RAD_' + str(i + 1) + ' [W/m2]': i for i in range(len(met_names))})
+        for key in ['inclined', 'horizontal']:
+            unknown = [name for name in config[key] if name not in positions]
+            if unknown:
+                raise TopologyError('{} pyranometers {} are not in the meteo data, whose columns are {}'
+                                    .format(key, unknown, list(met_names)))
+        self.incl = np.array([positions[name] for name in config['inclined']], dtype=np.intp)
+        self.horiz = np.array([positions[name] for name in config['horizontal']], dtype=np.intp)
+
+        # Inverter of every group of string boxes, and then of every string box
+        groups = [key for key, names in scb_groups]
+        if config['scb_groups'] is None:
+            if len(groups) > len(self.inv_names):
+                raise TopologyError('There are {} groups of string boxes but only {} inverters; assign them in {}'
+                                    .format(len(groups), len(self.inv_names), TOPOLOGY_FILE))
+            group_inv = dict(zip(groups, range(len(groups))))
+        else:
+            missing, unknown = set(groups) - set(config['scb_groups']), set(config['scb_groups']) - set(groups)
+            if missing or unknown:
+                raise TopologyError('scb_groups must assign every group of string boxes {}: missing {}, unknown {}'
+                                    .format(groups, sorted(missing), sorted(unknown)))
+            self.check_inverters(config['scb_groups'].values(), inv_position, 'scb_groups')
+            group_inv = {key: inv_position[inv] for key, inv in config['scb_groups'].items()}
+
+        if len(set(self.scb_names)) < len(self.scb_names):
+            raise TopologyError('The string box names are repeated: {}'.format(
+                sorted({name for name in self.scb_names if self.scb_names.count(name) > 1})))
+        scb_inv = {name: group_inv[key] for key, names in scb_groups for name in names}
+        unknown = set(config['scb_inverter']) - set(scb_inv)
+        if unknown:
+            raise TopologyError('scb_inverter has string boxes that are not in the data: {}'.format(sorted(unknown)))
+        self.check_inverters(config['scb_inverter'].values(), inv_position, 'scb_inverter')
+        scb_inv.update({name: inv_position[inv] for name, inv in config['scb_inverter'].items()})
+        self.scb_inv = np.array([scb_inv[name] for name in self.scb_names], dtype=np.intp)
+        self.scb_count = np.bincount(self.scb_inv, minlength=len(self.inv_names))
+
+        # Inverter number (1-based position) of every element that can be given in the outage tickets
+        self.elements = {name: inv + 1 for name, inv in scb_inv.items()}
+        self.elements.update({name: inv + 1 for name, inv in inv_position.items()})
+
+        # The inverters are numbered by the position of their column in the output column names
+        numbers = [str(i) for i in range(1, len(self.inv_names) + 1)]
+        n_groups = int(self.scb_inv.max()) + 1 if len(self.scb_inv) else 0
+        self.columns = {'HPm-I': ['HPm-I' + i for i in numbers], 'COM-I': ['COM-I' + i for i in numbers],
+                        'Am-I': ['Am-I' + i for i in numbers[:n_groups]]}
+
+
+    @staticmethod
+    def check_inverters(names, inv_position, key):
+        unknown = sorted(set(names) - set(inv_position))
+        if unknown:
+            raise TopologyError('{} has inverters that are not in the inverter data: {}; the inverters are {}'
+                                .format(key, unknown, list(inv_position)))
+
+
+    def element_inverter(self, element):
+        '''
+        Returns
+        -------
+        inv : Integer inverter number of a string box or inverter named as in the data; any other element is parsed
+              by function element_inverter ("SCB I-N", "INV I" or "I")
+
+        '''
+
+        inv = self.elements.get(element)
+
+        return element_inverter(element) if inv is None else inv
+
+
+    def check_data(self, met_data, scb_data, inv_data):
+        '''
+        Raises TopologyError when the dataframes read do not have the columns of the headers compiled, e.g. when they
+        were given instead of being read for this topology
+
+        '''
+
+        if list(scb_data.columns) != self.scb_names or list(inv_data.columns) != self.inv_names or \
+           met_data.shape[1] <= max(self.incl.max(), self.horiz.max()):
+            raise TopologyError('The data read does not match the topology compiled from the .csv headers')
+
+
+    def to_dict(self):
+        # The compiled values that the results depend on, e.g. to check that running totals were calculated with the
+        # same topology
+        return {'irr_threshold': self.irr_threshold, 'scb_threshold': self.scb_threshold,
+                'inclined': self.incl.tolist(), 'horizontal': self.horiz.tolist(), 'scb_inv': self.scb_inv.tolist()}
+
+
+    def kernel_inputs(self, met_data, scb_data, inv_data):
+        '''
+        Returns
+        -------
+        inputs : Dictionary with the arguments rad_incl, rad_horiz, scb_power, scb_inv, inv_power, irr_threshold and
+                 scb_threshold of function availability_kernel
+
+        '''
+
+        met = met_data.to_numpy()
+
+        return {'rad_incl': met[:, self.incl], 'rad_horiz': met[:, self.horiz], 'scb_power': scb_data.to_numpy(),
+                'scb_inv': self.scb_inv, 'inv_power': inv_data.to_numpy(), 'irr_threshold': self.irr_threshold,
+                'scb_threshold': self.scb_threshold}
+
+
+def load_topology(root_path, timeframe, config_file=None):
+    '''
+    Parameters
+    ----------
+    root_path : String with the path of the project folder
+    timeframe : String name of the timeframe subfolder, e.g. '2020_09'
+    config_file : String, optional. The default is None, meaning root_path/plant_topology.json. Configuration file
+
+    Returns
+    -------
+    topology : PlantTopology of the plant-month, compiled the first time its configuration and headers are seen and
+               then taken from COMPILED while it is one of the MAX_COMPILED most recently used
+
+    '''
+
+    # Only the default configuration file may be missing, in which case the default configuration is used
+    if config_file and not os.path.exists(config_file):
+        raise TopologyError('The topology file {} does not exist'.format(config_file))
+    config_file = os.path.abspath(config_file or os.path.join(root_path, TOPOLOGY_FILE))
+    try:
+        stat = os.stat(config_file)
+        config_key = (config_file, stat.st_size, stat.st_mtime_ns)
+    except FileNotFoundError:
+        config_key = None
+    key = (config_key, read_headers(root_path, timeframe))
+    with COMPILED_LOCK:
+        topology = COMPILED.get(key)
+        if topology is not None:
+            COMPILED.move_to_end(key)
+            return topology
+
+    topology = PlantTopology(read_config(config_file if config_key else None), *key[1])
+    with COMPILED_LOCK:
+        COMPILED[key] = topology
+        while len(COMPILED) > MAX_COMPILED:
+            COMPILED.popitem(last=False)
+
+    return topology
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+Timings and memory of every stage of a run, written as a JSON run report.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import datetime
+import tracemalloc
+import contextlib
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    # the resource module only exists on Unix
+    resource = None
+
+MEMORY_MODES = [None, 'rss', 'tracemalloc']
+SUMMARY_COLUMNS = ['name', 'seconds', 'rows', 'columns', 'peak_mib', 'delta_mib', 'retained_mib', 'rss_mib']
+
+
+def current_rss():
+    '''
+    Returns
+    -------
+    rss : Float, resident memory of the process in MiB, or None when it can not be read (it is read from /proc on
+          Linux)
+
+    '''
+
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss():
+    '''
+    Returns
+    -------
+    rss : Float, peak resident memory of the process in MiB since it started or since the last call to function
+          reset_peak_rss, or None when it can not be read (it is read from /proc on Linux)
+
+    '''
+
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 2 ** 10
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss():
+    '''
+    Returns
+    -------
+    reset : Boolean, whether the peak resident memory of the process could be reset to the current resident memory;
+            Linux resets it when '5' is written to /proc/self/clear_refs
+
+    '''
+
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def max_rss():
+    '''
+    Returns
+    -------
+    rss : Float, peak resident memory of the process in MiB, or None when the resource module is not available
+
+    '''
+
+    if resource is None:
+        return None
+    # ru_maxrss is given in KiB on Linux and in bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10)
+
+
+class RunProfiler:
+
+    def __init__(self, memory=None, **context):
+        '''
+        Parameters
+        ----------
+        memory : String, optional. The default is None. How to sample the peak memory of each stage: 'rss' for the
+                 peak resident memory of the process, which costs nothing while the stage runs but needs Linux to
+                 reset the peak between stages; 'tracemalloc' for the peak memory allocated by Python and numpy, which
+                 works everywhere but slows down the stages that create many Python objects (e.g. the writers) by
+                 an order of magnitude; None not to sample it. The elapsed times are always recorded
+        **context : Values that describe the run (e.g. project and timeframe), stored in the run report
+
+        '''
+
+        if memory not in MEMORY_MODES:
+            raise ValueError('memory must be one of {}'.format(MEMORY_MODES))
+        if memory == 'rss' and (peak_rss() is None or not reset_peak_rss()):
+            # the peak resident memory can not be sampled by stage on this system
+            memory = 'tracemalloc'
+        self.memory = memory
+        self.context = context
+        # Resetting the peak resident memory also resets the one given by the resource module, so I keep the peak of
+        # the whole run myself
+        self.peak = 0.0
+        self.stages = []
+        self.open = []
+        self.started = datetime.datetime.now().isoformat(timespec='seconds')
+        self.start = time.perf_counter()
+        if memory == 'tracemalloc' and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+
+    def sample(self):
+        '''
+        Returns
+        -------
+        current, peak : Floats with the memory in use and its peak since the last reset, in MiB
+
+        '''
+
+        if self.memory == 'rss':
+            return current_rss(), peak_rss()
+        current, peak = tracemalloc.get_traced_memory()
+
+        return current / 2 ** 20, peak / 2 ** 20
+
+
+    def reset(self):
+        '''
+        Resets the peak of the memory sampled by method sample to the memory in use
+
+        '''
+
+        if self.memory == 'rss':
+            self.peak = max(self.peak, peak_rss())
+            reset_peak_rss()
+        else:
+            tracemalloc.reset_peak()
+
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        '''
+        Times the block of code run within the context and, when memory is given, samples the peak memory while it
+        runs; the dictionary yielded can be given the keys 'rows' and 'columns' of the data of the stage, and any
+        other value to be stored in the run report
+
+        Parameters
+        ----------
+        name : String name of the stage; the stages opened within another stage are named after it, e.g.
+               'availability_calc.kernel'
+
+        '''
+
+        record = {'name': '.'.join([parent['name'] for parent in self.open] + [name]), 'seconds': None,
+                  'rows': None, 'columns': None}
+        self.stages.append(record)
+        if self.memory:
+            # The peak reached so far belongs to the stages already open, so I keep it before resetting it
+            current, peak = self.sample()
+            for parent in self.open:
+                parent['_peak'] = max(parent['_peak'], peak)
+            self.reset()
+            record['_start'], record['_peak'] = current, current
+        self.open.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            self.open.pop()
+            if self.memory:
+                current, peak = self.sample()
+                peak = max(record.pop('_peak'), peak)
+                for parent in self.open:
+                    parent['_peak'] = max(parent['_peak'], peak)
+                self.reset()
+                record['peak_mib'] = peak
+                record['delta_mib'] = peak - record.pop('_start')
+                record['retained_mib'] = current
+            record['rss_mib'] = current_rss()
+
+
+    def report(self):
+        '''
+        Returns
+        -------
+        report : Dictionary with the context of the run, its total time and peak resident memory, and a list with a
+                 dictionary for each stage, in the order they were opened, with keys 'name', 'seconds', 'rows',
+                 'columns' and 'rss_mib' (resident memory at its end), plus 'peak_mib', 'delta_mib' (peak above the
+                 memory in use when it started) and 'retained_mib' (in use when it ended) when memory is given
+
+        '''
+
+        peaks = [max_rss(), self.peak, peak_rss() if self.memory == 'rss' else None]
+        peak = max([rss for rss in peaks if rss] or [None])
+        run = dict(self.context, started=self.started, seconds=time.perf_counter() - self.start, max_rss_mib=peak,
+                   memory=self.memory, python=platform.python_version(), pandas=pd.__version__,
+                   numpy=np.__version__)
+
+        return {'run': run, 'stages': [dict(stage) for stage in self.stages]}
+
+
+    def to_json(self, file_name):
+        '''
+        Writes the run report returned by method report to the .json file file_name
+
+        '''
+
+        with open(file_name, 'w') as f:
+            json.dump(self.report(), f, indent=2, default=str)
+
+
+    def summary(self):
+        '''
+        Returns
+        -------
+        summary : String with a table of the stages of the run report
+
+        '''
+
+        # Only the columns of numbers are shown, and the stages without rows and columns are shown empty
+        stages = pd.DataFrame(self.report()['stages'])
+        stages = stages[[col for col in SUMMARY_COLUMNS if col in stages.columns]]
+        for col in ['rows', 'columns']:
+            stages[col] = stages[col].astype('Int64')
+
+        return stages.set_index('name').round(3).to_string(na_rep='')
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+Loader of the SCADA .csv exports shared by the meteo, string box and inverter readers.
+"""
+import io
+import csv
+import numpy as np
+import pandas as pd
+
+DATE_FORMAT = '%d/%m/%Y %H:%M'
+HEADER_ROWS = 3
+
+# Positions of the characters of a 'DD/MM/YYYY HH:MM' stamp rearranged as an ISO 'YYYY-MM-DDTHH:MM' stamp
+ISO_ORDER = [6, 7, 8, 9, 2, 3, 4, 2, 0, 1, 10, 11, 12, 13, 14, 15]
+
+
+def read_csv_header(file_name):
+    '''
+    Parameters
+    ----------
+    file_name : String with the full path of a SCADA .csv export
+
+    Returns
+    -------
+    project_name : String with the project name stored in the last field of the first line of the file
+    col_names : List of strings with the column names stored in the second line of the file, the first one
+                being the name of the date and time column
+
+    '''
+    
+    # The SCADA exports start with a title line and a line with the column names; I only read these two
+    # lines instead of parsing the whole file twice with pandas
+    with open(file_name, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f, delimiter=';', quotechar='"')
+        title = next(reader)
+        col_names = next(reader)
+        
+    return title[-1], col_names
+
+
+def parse_dates(values):
+    '''
+    Parameters
+    ----------
+    values : Array-like of strings with structure 'DD/MM/YYYY HH:MM'
+
+    Returns
+    -------
+    index : Pandas DatetimeIndex named 'Date' with the parsed day and time of each value
+
+    '''
+    
+    # When all stamps are zero padded, I rearrange their bytes into ISO stamps that numpy converts directly; this
+    # is much faster than parsing every stamp with a format string
+    try:
+        stamps = np.asarray(values, dtype='S17')
+    except UnicodeEncodeError:
+        stamps = np.array([], dtype='S17')
+    chars = stamps.view(np.uint8).reshape(len(stamps), 17)
+    digits = chars[:, [0, 1, 3, 4, 6, 7, 8, 9, 11, 12, 14, 15]]
+    if (len(stamps) > 0 and (chars[:, [2, 5]] == ord('/')).all() and (chars[:, 10] == ord(' ')).all() and 
+            (chars[:, 13] == ord(':')).all() and (chars[:, 16] == 0).all() and 
+            ((digits >= ord('0')) & (digits <= ord('9'))).all()):
+        iso = np.ascontiguousarray(chars[:, ISO_ORDER])
+        iso[:, [4, 7]] = ord('-')
+        iso[:, 10] = ord('T')
+        return pd.DatetimeIndex(iso.view('S16').ravel().astype('datetime64[m]'), dtype='datetime64[ns]', name='Date')
+    
+    return pd.DatetimeIndex(pd.to_datetime(np.asarray(values, dtype=object), format=DATE_FORMAT),
+                            dtype='datetime64[ns]', name='Date')
+
+
+def clean_records(df, col_names, dtype='float64'):
+    '''
+    Parameters
+    ----------
+    df : Pandas Dataframe with the raw records of a SCADA .csv export, as read by pandas.read_csv
+    col_names : List of strings with the names of all the columns including the date and time column
+    dtype : String or numpy dtype, optional. The default is 'float64'. Data type of the numeric columns
+
+    Returns
+    -------
+    df : Pandas Dataframe that contains the clean numeric data of the records, the index 'Date' being day and time
+
+    '''
+    
+    df.columns = col_names
+    
+    # I parse all dates and times in one vectorized step with an explicit format
+    df.index = parse_dates(df.iloc[:, 0].to_numpy(dtype=object))
+    df = df.iloc[:, 1:]
+    
+    # columns that hold any value that is not a number are coerced, the wrong values becoming NaN
+    for i in np.flatnonzero(~np.array([pd.api.types.is_numeric_dtype(t) for t in df.dtypes], dtype=bool)):
+        df.isetitem(i, pd.to_numeric(df.iloc[:, i], errors='coerce'))
+    
+    return df.astype(dtype)
+
+
+def parse_records(source, col_names, dtype='float64', skiprows=HEADER_ROWS, chunk_rows=None):
+    '''
+    Parameters
+    ----------
+    source : String with the full path of a SCADA .csv export, or a file-like object with its records
+    col_names : List of strings with the names of all the columns including the date and time column
+    dtype : String or numpy dtype, optional. The default is 'float64'. Data type of the numeric columns
+    skiprows : Integer, optional. The default is HEADER_ROWS. Number of lines to skip before the first record
+    chunk_rows : Integer, optional. The default is None. When given, the records are parsed lazily by chunks of
+                 chunk_rows records
+
+    Returns
+    -------
+    df : Pandas Dataframe that contains the clean numeric data of the records, the index 'Date' being day and time;
+         or, when chunk_rows is given, a generator of such dataframes
+
+    '''
+    
+    # I read the file with the C engine and a single character delimiter, so quotes are handled natively while
+    # parsing instead of replacing them afterwards in all the dataframe; the date and time column is kept as a
+    # string and the rest of the columns are parsed as numbers directly by the C parser
+    options = dict(sep=';', quotechar='"', header=None, skiprows=skiprows, dtype={0: str}, engine='c')
+    if chunk_rows:
+        return (clean_records(df, col_names, dtype) for df in pd.read_csv(source, chunksize=chunk_rows, **options))
+    
+    try:
+        df = pd.read_csv(source, **options)
+    except pd.errors.EmptyDataError:
+        df = pd.DataFrame(columns=range(len(col_names)), dtype=object)
+    
+    return clean_records(df, col_names, dtype)
+
+
+def first_records(df):
+    '''
+    Returns
+    -------
+    df : df without the records of repeated timestamps, keeping the first record of each timestamp as function
+         Common.Align_Data.align_frames does, e.g. for the hour repeated when the clocks go back in October
+
+    '''
+    
+    repeated = df.index.duplicated(keep='first')
+    
+    return df[~repeated] if repeated.any() else df
+
+
+def align_chunks(chunks):
+    '''
+    Parameters
+    ----------
+    chunks : List of iterators of dataframes with sorted datetime indexes, e.g. the chunks of several .csv files
+
+    Returns
+    -------
+    aligned : Generator of lists of dataframes, one from each iterator, all with the same index; each list holds the
+              timestamps common to all the iterators up to the last timestamp that all of them have reached, so only
+              about one chunk of each iterator is held in memory. A repeated timestamp keeps its first record, as in
+              function Common.Align_Data.align_frames, also when the repetition comes in a later chunk
+
+    '''
+    
+    buffers = [None] * len(chunks)
+    exhausted = [False] * len(chunks)
+    cutoff = None
+    while True:
+        # I make sure that every buffer has records, reading the next chunk of the iterators whose buffer is empty;
+        # the records up to the previous cutoff have already been yielded or discarded
+        for i, chunk in enumerate(chunks):
+            while not exhausted[i] and (buffers[i] is None or len(buffers[i]) == 0):
+                new = next(chunk, None)
+                if new is None:
+                    exhausted[i] = True
+                    continue
+                if cutoff is not None:
+                    new = new[new.index > cutoff]
+                buffers[i] = first_records(new if buffers[i] is None else pd.concat([buffers[i], new]))
+        if any(buffer is None or len(buffer) == 0 for buffer in buffers):
+            return
+        
+        cutoff = min(buffer.index.max() for buffer in buffers)
+        index = buffers[0].index[buffers[0].index <= cutoff]
+        for buffer in buffers[1:]:
+            index = index.intersection(buffer.index[buffer.index <= cutoff], sort=True)
+        yield [buffer.loc[index] for buffer in buffers]
+        buffers = [buffer[buffer.index > cutoff] for buffer in buffers]
+
+
+def read_new_records(file_name, offset, col_names, dtype='float64'):
+    '''
+    Parameters
+    ----------
+    file_name : String with the full path of a SCADA .csv export that grows by appending records
+    offset : Integer byte position of the file where the records not read yet start; 0 when nothing has been read
+    col_names : List of strings with the names of all the columns including the date and time column
+    dtype : String or numpy dtype, optional. The default is 'float64'. Data type of the numeric columns
+
+    Returns
+    -------
+    df : Pandas Dataframe with the records after offset, as returned by parse_records
+    offset : Integer byte position after the last complete record read; a record still being written (without
+             end of line) is left for the next read, and so is an incomplete header
+
+    '''
+    
+    with open(file_name, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+        
+    end = data.rfind(b'\n') + 1
+    skiprows = HEADER_ROWS if offset == 0 else 0
+    # The header lines are only skipped when reading from the start, so the offset stays there until all of them
+    # have been written
+    if data.count(b'\n', 0, end) < skiprows:
+        end = 0
+    
+    return parse_records(io.BytesIO(data[:end]), col_names, dtype, skiprows), offset + end
+
+
+def read_scada_csv(file_name, col_names=None, dtype='float64', cache=None, offsets=None, chunk_rows=None):
+    '''
+    Parameters
+    ----------
+    file_name : String with the full path of a SCADA .csv export; the file has a title line, a line with the
+                column names and a third line that is not data, followed by ';' separated and '"' quoted records,
+                the first field of each record being the day and time with structure 'DD/MM/YYYY HH:MM'
+    col_names : List of strings, optional. Names given to all the columns of the file including the date and time
+                column; when None, the names in the second line of the file are used
+    dtype : String or numpy dtype, optional. The default is 'float64'. Data type of the numeric columns; 'float32'
+            halves the memory used by the measurements
+    cache : DataCache, optional. The default is None. When given, the cleaned dataframe is taken from the cache if
+            the file has not changed since it was stored, and stored in the cache otherwise
+    offsets : Dictionary, optional. The default is None. When given, only the records appended since the previous
+              read are returned; offsets maps each file name to the byte position where its new records start, and
+              it is updated with the position after the records read. The cache is not used in this case
+    chunk_rows : Integer, optional. The default is None. When given, a generator of dataframes of chunk_rows records
+                 is returned instead, so that the file is never held in memory at once
+
+    Returns
+    -------
+    df : Pandas Dataframe that contains the clean numeric data of the file, the index 'Date' being day and time
+
+    '''
+    
+    if chunk_rows:
+        if col_names is None:
+            col_names = read_csv_header(file_name)[1]
+        return parse_records(file_name, col_names, dtype, chunk_rows=chunk_rows)
+    
+    if offsets is not None:
+        if col_names is None:
+            col_names = read_csv_header(file_name)[1]
+        df, offsets[file_name] = read_new_records(file_name, offsets.get(file_name, 0), col_names, dtype)
+        return df
+    
+    if cache is not None:
+        key = cache.fingerprint(file_name, col_names=None if col_names is None else list(col_names),
+                                dtype=np.dtype(dtype).name)
+        df = cache.load(key)
+        if df is not None:
+            return df
+    
+    if col_names is None:
+        col_names = read_csv_header(file_name)[1]
+    
+    df = parse_records(file_name, col_names, dtype)
+    if cache is not None:
+        cache.store(key, df)
+    
+    return df
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Writers of the availability report: constant-memory .xlsx, pandas Excel, parquet and .csv backends.
+"""
+import numpy as np
+import pandas as pd
+
+BACKENDS = ['xlsx', 'excel', 'parquet', 'csv']
+RAW_SHEETS = ['RAW_SCB', 'RAW_MET', 'RAW_INV']
+CHUNK_ROWS = 10000
+
+
+def numeric_flags(df):
+    '''
+    Parameters
+    ----------
+    df : Pandas Dataframe
+
+    Returns
+    -------
+    df : Pandas Dataframe with its boolean columns (the availability flags) as 1 and 0 of type uint8, so that they are
+         written as numbers; df itself when it has no boolean columns
+
+    '''
+    
+    flags = [col for col, dtype in df.dtypes.items() if dtype == bool]
+    
+    return df.astype({col: np.uint8 for col in flags}) if flags else df
+
+
+def sheet_rows(df):
+    '''
+    Parameters
+    ----------
+    df : Pandas Dataframe with a datetime index
+
+    Returns
+    -------
+    rows : Generator of lists, each one with the day and time of a row followed by its values as Python objects;
+           NaN and infinite values are replaced by None so that they are written as empty cells, as numbers that are not
+           finite can not be written to a workbook
+
+    '''
+    
+    # I convert the dataframe by chunks of rows, so that only one chunk is copied into Python objects at a time
+    for start in range(0, len(df), CHUNK_ROWS):
+        chunk = numeric_flags(df.iloc[start:start + CHUNK_ROWS])
+        nulls = chunk.isna().to_numpy() | chunk.isin([np.inf, -np.inf]).to_numpy()
+        dates = chunk.index.to_pydatetime()
+        for date, row, null in zip(dates, chunk.itertuples(index=False, name=None), nulls):
+            row = list(row)
+            if null.any():
+                for i in np.flatnonzero(null):
+                    row[i] = None
+            yield [date] + row
+
+
+def write_xlsx(filename, sheets):
+    '''
+    Writes each dataframe of the dictionary sheets to a sheet of the .xlsx workbook filename row by row, with 
+    xlsxwriter in constant_memory mode or, if xlsxwriter is not installed, with openpyxl in write_only mode; the
+    memory used does not depend on the size of the dataframes
+    
+    '''
+    
+    try:
+        import xlsxwriter
+    except ImportError:
+        xlsxwriter = None
+        
+    if xlsxwriter is not None:
+        workbook = xlsxwriter.Workbook(filename, {'constant_memory': True})
+        date_format = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
+        for sheet_name, df in sheets.items():
+            worksheet = workbook.add_worksheet(sheet_name)
+            worksheet.write_row(0, 0, [df.index.name or ''] + [str(col) for col in df.columns])
+            for r, row in enumerate(sheet_rows(df), start=1):
+                worksheet.write_datetime(r, 0, row[0], date_format)
+                worksheet.write_row(r, 1, row[1:])
+        workbook.close()
+        return
+    
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportError("Writing .xlsx files requires the 'xlsxwriter' or the 'openpyxl' package")
+        
+    workbook = openpyxl.Workbook(write_only=True)
+    for sheet_name, df in sheets.items():
+        worksheet = workbook.create_sheet(sheet_name)
+        worksheet.append([df.index.name or ''] + [str(col) for col in df.columns])
+        for row in sheet_rows(df):
+            worksheet.append(row)
+    workbook.save(filename)
+
+
+def write_report(file_stem, sheets, backend='xlsx', include_raw=True):
+    '''
+    Parameters
+    ----------
+    file_stem : String with the path and name of the output without extension, e.g. 'Availability Calc - P - 2020_09'
+    sheets : Dictionary of Pandas Dataframes, the keys being the names of the sheets ('RAW_SCB', 'RAW_MET', 'RAW_INV'
+             and 'AVA')
+    backend : String, optional. The default is 'xlsx'.
+              'xlsx' streams all sheets to a single .xlsx workbook using constant memory
+              'excel' writes a single .xlsx workbook with pandas.ExcelWriter, holding the whole workbook in memory
+              'parquet' writes one .parquet file per sheet (requires pyarrow or fastparquet)
+              'csv' writes one .csv file per sheet
+    include_raw : Boolean, optional. The default is True. Whether to write the raw data sheets
+
+    Returns
+    -------
+    files : List of strings with the paths of the files written
+
+    '''
+    
+    if backend not in BACKENDS:
+        raise ValueError("Unknown report backend '{}', expected one of {}".format(backend, BACKENDS))
+    if not include_raw:
+        sheets = {name: df for name, df in sheets.items() if name not in RAW_SHEETS}
+        
+    if backend == 'xlsx':
+        write_xlsx(file_stem + '.xlsx', sheets)
+        return [file_stem + '.xlsx']
+    
+    if backend == 'excel':
+        with pd.ExcelWriter(file_stem + '.xlsx') as writer:
+            for sheet_name, df in sheets.items():
+                numeric_flags(df).to_excel(writer, sheet_name=sheet_name)
+        return [file_stem + '.xlsx']
+    
+    files = []
+    for sheet_name, df in sheets.items():
+        files.append(file_stem + ' - ' + sheet_name + '.' + backend)
+        if backend == 'parquet':
+            # parquet only accepts string column names; it stores the flags as booleans packed in bits
+            df.set_axis([str(col) for col in df.columns], axis=1).to_parquet(files[-1])
+        else:
+            numeric_flags(df).to_csv(files[-1])
+            
+    return files
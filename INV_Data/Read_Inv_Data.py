@@ -7,9 +7,27 @@ Created on Mon Oct 19 23:02:59 2020
          https://greenenerguy.me/
 """
 import os
-import pandas as pd
+from Common.Read_Csv_Data import read_csv_header, read_scada_csv
 
-def read_inv_data(inv_data_path, timeframe):
+def inv_file(inv_data_path, timeframe):
+    '''
+    Returns
+    -------
+    file_name : String with the full path of the inverter .csv file of the timeframe subfolder of inv_data_path
+
+    '''
+    
+    # In my specific case, the inverter data is stored in the timeframe folder within a .csv file 
+    # that includes the string 'Report' in the file name
+    path = os.path.join(os.getcwd(), inv_data_path, timeframe)       
+    for file in os.listdir(path):
+        if file.endswith('csv') and 'Report' in file:
+            inv_data = file    
+                
+    return os.path.join(path, inv_data)
+
+
+def read_inv_data(inv_data_path, timeframe, dtype='float64', cache=None, offsets=None, chunk_rows=None):
     '''
     Parameters
     ----------
@@ -18,6 +36,13 @@ def read_inv_data(inv_data_path, timeframe):
     timeframe : String name indicating the folder where the inverter active power csv data to be read is located;
                 e.g. the subfolder \Inv_Data\2020_09 contains the csv file where the September inverter power data
                 is located. timeframe refers to the string '2020_09'
+    dtype : String or numpy dtype, optional. The default is 'float64'. Data type of the active power columns
+    cache : DataCache, optional. The default is None. Cache of cleaned dataframes used instead of parsing the
+            .csv files that have not changed
+    offsets : Dictionary, optional. The default is None. Byte position of each .csv file up to which it has already
+              been read; when given, only the records appended since then are returned and offsets is updated
+    chunk_rows : Integer, optional. The default is None. When given, the data is read lazily by chunks of chunk_rows
+                 records and a generator of inv dataframes is returned
 
     Returns
     -------
@@ -25,43 +50,12 @@ def read_inv_data(inv_data_path, timeframe):
             \inv_data_path\timeframe, the index being day and time
     '''
     
-    # In my specific case, the inverter data is stored in the timeframe folder within a .csv file 
-    # that includes the string 'Report' in the file name
-    path = os.path.join(os.getcwd(), inv_data_path, timeframe)       
-    for file in os.listdir(path):
-        if file.endswith('csv') and 'Report' in file:
-            inv_data = file    
-                
-    file_name = os.path.join(path, inv_data)
-    project_name, inv_col_names = pd.read_csv(file_name).columns[0].split(';')[-1].replace('"', ''), \
-                                  pd.read_csv(file_name, delimiter=';', skiprows=1).columns
-                                                                    # get project name
-                                                                    # from data columns
-    
-    # In the following chunk of code I conduct a cleaning of the csv file
-    # first I read the .csv file and skip first two rows due to the configuration of the raw .csv file
-    inv = pd.read_csv(file_name, engine='python', delimiter='\;', skiprows=2)
-    inv = inv.applymap(lambda x: x.replace('"', '')) # replace " from all the dataframe
-    inv.columns = inv_col_names
-                                                                        
-    num_cols = len(inv.columns)
-            
-    for col in inv.columns[1:]:
-        inv[col] = pd.to_numeric(inv[col], errors='coerce') # transform strings
-                                                            # into numbers                                                 
-    # get dates and times
-    inv['Day'] = inv[inv.columns[0]].apply(lambda x: x.split()[0].split('/')[0])
-    inv['Month'] = inv[inv.columns[0]].apply(lambda x: x.split()[0].split('/')[1])
-    inv['Year'] = inv[inv.columns[0]].apply(lambda x: x.split()[0].split('/')[2])
-    inv['Time'] = inv[inv.columns[0]].apply(lambda x: x.split()[1])
-    
-    # build date from Day, Month, Year and Time items from previous block
-    inv['Date'] = inv['Year'] + '-' + inv['Month'] + '-' + inv['Day'] + ' ' + inv['Time']
+    file_name = inv_file(inv_data_path, timeframe)
+    project_name, inv_col_names = read_csv_header(file_name) # get project name
+                                                             # from data columns
     
-    inv['Date'] = pd.to_datetime(inv['Date']) # create datetime object
-    inv.set_index('Date', inplace=True) # define datetime object as index of the dataframe
-    del inv[inv.columns[0]] 
-    inv.drop(inv.columns[num_cols-1:], inplace=True, axis=1)
+    # The shared loader conducts the cleaning of the csv file and returns numeric columns indexed by date and time
+    inv = read_scada_csv(file_name, inv_col_names, dtype=dtype, cache=cache, offsets=offsets, chunk_rows=chunk_rows)
         
     # start_date = inv.index.values.astype(str)[0][:16] \
     #                             .replace('T', '-').replace(':', 'h') # get first measurement item
@@ -7,9 +7,27 @@ Created on Sat Oct 17 23:26:59 2020
          https://greenenerguy.me/
 """
 import os
-import pandas as pd
+from Common.Read_Csv_Data import read_csv_header, read_scada_csv
 
-def read_met_data(met_data_path, timeframe):
+def met_file(met_data_path, timeframe):
+    '''
+    Returns
+    -------
+    file_name : String with the full path of the meteo .csv file of the timeframe subfolder of met_data_path
+
+    '''
+    
+    # In my specific case, the met data is stored in the timeframe folder within a .csv file 
+    # that includes the string 'Report' in the file name
+    path = os.path.join(os.getcwd(), met_data_path, timeframe)       
+    for file in os.listdir(path):
+        if file.endswith('csv') and 'Report' in file:
+            met_data = file
+            
+    return os.path.join(path, met_data)
+
+
+def read_met_data(met_data_path, timeframe, dtype='float64', cache=None, offsets=None, chunk_rows=None):
     '''
     Parameters
     ----------
@@ -19,6 +37,13 @@ def read_met_data(met_data_path, timeframe):
     timeframe : String name indicating the folder with the meteorological csv data to be read; e.g. the subfolder 
                 \Met_Data\2020_09\ contains the csv file where the September meteo data is stored. In this instance, 
                 timeframe refers to the string '2020_09'
+    dtype : String or numpy dtype, optional. The default is 'float64'. Data type of the irradiance columns
+    cache : DataCache, optional. The default is None. Cache of cleaned dataframes used instead of parsing the
+            .csv files that have not changed
+    offsets : Dictionary, optional. The default is None. Byte position of each .csv file up to which it has already
+              been read; when given, only the records appended since then are returned and offsets is updated
+    chunk_rows : Integer, optional. The default is None. When given, the data is read lazily by chunks of chunk_rows
+                 records and a generator of meteo dataframes is returned
 
     Returns
     -------
@@ -27,45 +52,18 @@ def read_met_data(met_data_path, timeframe):
 
     '''
     
-    # In my specific case, the met data is stored in the timeframe folder within a .csv file 
-    # that includes the string 'Report' in the file name
-    path = os.path.join(os.getcwd(), met_data_path, timeframe)       
-    for file in os.listdir(path):
-        if file.endswith('csv') and 'Report' in file:
-            met_data = file
-            
-    file_name = os.path.join(path, met_data)
-    project_name = pd.read_csv(file_name).columns[0].split(';')[-1].replace('"', '')
-                                                                    # get project name
-                                                                    # from data columns
-    
-    # In the following chunk of code I conduct a cleaning of the csv file
-    # first I read the .csv file and skip first two rows due to the configuration of the raw .csv file
-    meteo = pd.read_csv(file_name, engine='python', delimiter='\;', skiprows=2)
-    meteo = meteo.applymap(lambda x: x.replace('"', '')) # replace " from all the dataframe
-    meteo.columns = ['RAD_' + str(i) + ' [W/m2]' for i in range(len(meteo.columns))]
-    
-
-    num_columns = len(meteo.columns)
-        
-    for col in meteo.columns[1:]:
-        meteo[col] = pd.to_numeric(meteo[col], errors='coerce') # transform strings
-                                                                # into numbers
-        
-    # get dates and times
-    meteo['Day'] = meteo[meteo.columns[0]].apply(lambda x: x.split()[0].split('/')[0])
-    meteo['Month'] = meteo[meteo.columns[0]].apply(lambda x: x.split()[0].split('/')[1])
-    meteo['Year'] = meteo[meteo.columns[0]].apply(lambda x: x.split()[0].split('/')[2])
-    meteo['Time'] = meteo[meteo.columns[0]].apply(lambda x: x.split()[1])
+    file_name = met_file(met_data_path, timeframe)
+    project_name, met_col_names = read_csv_header(file_name) # get project name
+                                                             # from data columns
     
-    # build date from Day, Month, Year and Time items from previous block
-    meteo['Date'] = meteo['Year'] + '-' + meteo['Month'] + '-' + meteo['Day'] \
-                         + ' ' + meteo['Time']
-                         
-    meteo['Date'] = pd.to_datetime(meteo['Date']) # create datetime object
-    meteo.set_index('Date', inplace=True) # define datetime object as index of the dataframe
-    del meteo[meteo.columns[0]] 
-    meteo.drop(meteo.columns[num_columns-1:], inplace=True, axis=1)
+    # The shared loader conducts the cleaning of the csv file and returns numeric columns indexed by date and time;
+    # the pyranometers are named after their position in the file
+    rad_names = ['RAD_' + str(i) + ' [W/m2]' for i in range(1, len(met_col_names))]
+    if chunk_rows:
+        return (chunk.set_axis(rad_names, axis=1) for chunk in 
+                read_scada_csv(file_name, met_col_names, dtype=dtype, chunk_rows=chunk_rows))
+    meteo = read_scada_csv(file_name, met_col_names, dtype=dtype, cache=cache, offsets=offsets)
+    meteo.columns = rad_names
     
     # start_date = meteo.index.values.astype(str)[0][:16] \
     #                             .replace('T', '-').replace(':', 'h') # get first measurement item
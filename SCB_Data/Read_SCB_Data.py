@@ -8,8 +8,27 @@ Created on Sun Oct 18 23:11:43 2020
 """
 import os
 import pandas as pd
+from Common.Read_Csv_Data import align_chunks, read_scada_csv
+from Common.Align_Data import align_frames
 
-def read_SCB_data(SCB_data_path, timeframe):
+def scb_files(SCB_data_path, timeframe):
+    '''
+    Returns
+    -------
+    files : Dictionary with the full path of the .csv file of each group of string boxes of the timeframe subfolder
+            of SCB_data_path, in name order, the keys being the names of the groups
+    
+    '''
+    
+    # In my specific case, the string box data are stored in the timeframe folder within several .csv files, each .csv
+    # file for each of the group of string boxes assigned to each inverter; these files include the string 'SCB' in 
+    # the file name, and the excerpt file[11:17] extracts the name of each group
+    path = os.path.join(os.getcwd(), SCB_data_path, timeframe)       
+    
+    return {file[11:17]: os.path.join(path, file) for file in sorted(os.listdir(path)) if 'SCB' in file}
+
+
+def read_SCB_data(SCB_data_path, timeframe, dtype='float64', cache=None, offsets=None, chunk_rows=None, align=True):
     '''
     Parameters
     ----------
@@ -18,6 +37,17 @@ def read_SCB_data(SCB_data_path, timeframe):
     timeframe : String name indicating the folder where the string box csv data to be read is located;
                 e.g. the subfolder \SCB_Data\2020_09 contains the csv files where the September string box
                 data is located. timeframe refers to the string '2020_09'
+    dtype : String or numpy dtype, optional. The default is 'float64'. Data type of the active power columns
+    cache : DataCache, optional. The default is None. Cache of cleaned dataframes used instead of parsing the
+            .csv files that have not changed
+    offsets : Dictionary, optional. The default is None. Byte position of each .csv file up to which it has already
+              been read; when given, only the records appended since then are returned and offsets is updated
+    chunk_rows : Integer, optional. The default is None. When given, the data is read lazily by chunks of chunk_rows
+                 records and a generator of (SCB_df, SCB_dict) tuples, the
+                 chunks of all groups of string boxes being aligned on the same timestamps is returned
+    align : Boolean, optional. The default is True. Whether to align the groups of string boxes on a common time
+            grid to build SCB_df; when False, SCB_df is None and the groups are returned as read, e.g. to align them
+            together with the meteo and inverter data with function align_frames
 
     Returns
     -------
@@ -28,41 +58,22 @@ def read_SCB_data(SCB_data_path, timeframe):
              
     '''
     
-    # In my specific case, the string box data are stored in the timeframe folder within several .csv files, each .csv
-    # file for each of the group of string boxes assigned to each inverter; these files include the string 'SCB' in 
-    # the file name
+    # The files are read in name order, so that the n-th group of string boxes is the one assigned to the n-th inverter
+    # unless the topology of the plant assigns them otherwise (refer to Common/Plant_Topology.py)
     SCB_dict = dict()
-    path = os.path.join(os.getcwd(), SCB_data_path, timeframe)       
-    for file in os.listdir(path):
-        if 'SCB' in file:
-            SCB_col_names = pd.read_csv(os.path.join(path, file), delimiter=';', skiprows=1).columns
-            SCB_dict[file[11:17]] = pd.read_csv(os.path.join(path, file), engine='python', delimiter='\;', skiprows=2)
-            SCB_dict[file[11:17]].columns = SCB_col_names # I am extracting the names of the string boxes to populate
-                                                          # the columns in each of the keys of the SCB_dict dictionary
-                                                          # the excerpt file[11:17] extracts the name of each string box
+    for key, file_name in scb_files(SCB_data_path, timeframe).items():
+        SCB_dict[key] = read_scada_csv(file_name, dtype=dtype, cache=cache, offsets=offsets, chunk_rows=chunk_rows)
+                                                          # the shared loader takes the names of the string boxes
+                                                          # from the header to populate the columns in each of the
+                                                          # keys of the SCB_dict dictionary
         
-    for key in SCB_dict:
-        SCB_dict[key] = SCB_dict[key].applymap(lambda x: x.replace('"', '')) # replace " from all the dataframe
+    if chunk_rows:
+        return ((pd.concat(chunks, axis=1), dict(zip(SCB_dict, chunks))) 
+                for chunks in align_chunks(list(SCB_dict.values())))
         
-        for col in SCB_dict[key].columns[1:]:
-            SCB_dict[key][col] = pd.to_numeric(SCB_dict[key][col], errors='coerce') # transform strings into numbers
-            
-        # get dates and times    
-        SCB_dict[key]['Day'] = SCB_dict[key][SCB_dict[key].columns[0]].apply(lambda x: x.split()[0].split('/')[0])
-        SCB_dict[key]['Month'] = SCB_dict[key][SCB_dict[key].columns[0]].apply(lambda x: x.split()[0].split('/')[1])
-        SCB_dict[key]['Year'] = SCB_dict[key][SCB_dict[key].columns[0]].apply(lambda x: x.split()[0].split('/')[2])
-        SCB_dict[key]['Time'] = SCB_dict[key][SCB_dict[key].columns[0]].apply(lambda x: x.split()[1])
-        SCB_dict[key]['Date'] = SCB_dict[key]['Year'] + '-' + SCB_dict[key]['Month'] + '-' + \
-                                SCB_dict[key]['Day'] + ' ' + SCB_dict[key]['Time']
-        SCB_dict[key]['Date'] = pd.to_datetime(SCB_dict[key]['Date']) # create datetime object
-        SCB_dict[key].set_index('Date', inplace=True) # define datetime object as index of the dataframe
-        SCB_dict[key] = SCB_dict[key].drop(['Day','Month','Year','Time'], axis=1) # eliminate auxiliary columns
-        del SCB_dict[key][SCB_dict[key].columns[0]] # eliminate first column where I have extracted dates and times from
-        
-    SCB_df = pd.DataFrame(index=SCB_dict[list(SCB_dict)[0]].index) # extracts the index from the first key of SCB_dict
-    for key in SCB_dict:
-        SCB_df = SCB_df.merge(SCB_dict[key], left_index=True, right_index=True) # merges all string boxes into a single
-                                                                                # dataframe
-
-        
-    return SCB_df, SCB_dict
+    if not align:
+        return None, SCB_dict
+    
+    # All groups are reindexed on a common time grid in a single pass, instead of merging them one by one; the
+    # groups of SCB_dict become column slices of SCB_df
+    return align_frames({'SCB': SCB_dict})[0]['SCB']
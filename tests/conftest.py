@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic plants shared by the tests of the calculation modes.
+"""
+import os
+import sys
+import glob
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Benchmarks.synthetic_scada import generate_plant
+
+TIMEFRAME = '2020_10'
+
+
+def repeat_records(file_name, stamps, value='999.000'):
+    # Every record of the given timestamps is written again right after the last of them, with all its values
+    # replaced, so that keeping the first or the last record of a timestamp gives different results
+    with open(file_name) as f:
+        lines = f.readlines()
+    positions = [i for i, line in enumerate(lines) if line.split(';')[0].strip('"') in stamps]
+    repeated = [';'.join([line.split(';')[0]] + ['"{}"'.format(value)] * (line.count(';'))) + '\n'
+                for line in (lines[i] for i in positions)]
+    lines[positions[-1] + 1:positions[-1] + 1] = repeated
+    with open(file_name, 'w') as f:
+        f.writelines(lines)
+
+
+@pytest.fixture(scope='session')
+def repeated_plant(tmp_path_factory):
+    '''
+    Returns
+    -------
+    root : String with the project folder of a month of 15-minute records in which every file repeats the hour from
+           02:00 on the 25th, as when the clocks go back, and one file of string boxes repeats one more record
+
+    '''
+
+    root = str(tmp_path_factory.mktemp('repeated_plant'))
+    generate_plant(root, TIMEFRAME, n_inv=3, scb_per_inv=4, freq='15min', seed=2)
+    hour = ['25/10/2020 02:{:02d}'.format(minute) for minute in range(0, 60, 15)]
+    for file_name in glob.glob(os.path.join(root, '*', TIMEFRAME, '*.csv')):
+        repeat_records(file_name, hour)
+    repeat_records(os.path.join(root, 'SCB_Data', TIMEFRAME, 'Report SCB INV-02.csv'), ['16/10/2020 14:15'], '1.000')
+
+    return root
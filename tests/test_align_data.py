@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the time grid of Common.Align_Data.
+"""
+import pandas as pd
+from conftest import TIMEFRAME
+from Common.Align_Data import align_frames, time_grid, timeframe_bounds
+
+
+def test_timeframe_bounds():
+    assert timeframe_bounds(TIMEFRAME) == (pd.Timestamp('2020-10-01'), pd.Timestamp('2020-11-01'))
+    assert timeframe_bounds('2020_12') == (pd.Timestamp('2020-12-01'), pd.Timestamp('2021-01-01'))
+    assert timeframe_bounds('Bench') == timeframe_bounds('2020_13') == timeframe_bounds('2020-10') == (None, None)
+
+
+def test_grid_extended_to_the_timeframe_with_the_offset_of_the_data():
+    # Data logged 2 minutes past every 5 minutes, from the second day to the 30th
+    index = pd.date_range('2020-10-02 00:02', '2020-10-30 23:57', freq='5min')
+
+    grid = time_grid([index], start=pd.Timestamp('2020-10-01'), end=pd.Timestamp('2020-11-01'))
+
+    assert grid[0] == pd.Timestamp('2020-10-01 00:02') and grid[-1] == pd.Timestamp('2020-10-31 23:57')
+    assert (grid[1:] - grid[:-1] == pd.Timedelta('5min')).all() and index.isin(grid).all()
+    assert time_grid([index]).equals(pd.DatetimeIndex(index, name='Date'))
+
+
+def test_grid_is_not_cut_to_the_timeframe():
+    index = pd.date_range('2020-09-30 23:00', '2020-11-01 00:00', freq='1h')
+
+    assert time_grid([index], start=pd.Timestamp('2020-10-01'), end=pd.Timestamp('2020-11-01')).equals(
+        pd.DatetimeIndex(index, name='Date'))
+
+
+def test_records_missing_at_the_end_of_the_timeframe_are_reported():
+    index = pd.date_range('2020-10-01', '2020-10-30 23:00', freq='1h')
+    met = pd.DataFrame({'RAD_1': 1.0}, index=index)
+    inv = pd.DataFrame({'INV 1': 1.0}, index=index[24:])
+
+    aligned, report = align_frames({'MET': met, 'INV': inv}, None, *timeframe_bounds(TIMEFRAME))
+
+    assert len(aligned['MET']) == len(aligned['INV']) == 31 * 24
+    assert report[['source', 'start', 'end', 'records']].values.tolist() == [
+        ['MET', pd.Timestamp('2020-10-31 00:00'), pd.Timestamp('2020-10-31 23:00'), 24],
+        ['INV', pd.Timestamp('2020-10-01 00:00'), pd.Timestamp('2020-10-01 23:00'), 24],
+        ['INV', pd.Timestamp('2020-10-31 00:00'), pd.Timestamp('2020-10-31 23:00'), 24]]
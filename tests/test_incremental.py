@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the month-to-date availability of Availability_Incremental against a full calculation.
+"""
+import os
+import glob
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import TIMEFRAME
+from Availability_Calc import Availability
+from Availability_Incremental import IncrementalAvailability
+from Common.Read_Csv_Data import parse_records, read_new_records
+
+
+def full_kpis(root):
+    calc = Availability('Test', TIMEFRAME, root_path=root)
+    calc.availability_calc(report=False)
+
+    return calc.month_avail_scb, calc.month_avail_inv, calc.irr_gain
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_updates_of_growing_files_with_repeated_timestamps(repeated_plant, tmp_path, seed):
+    # The files are copied a random number of lines at a time, some of them ending in half a record, so that the
+    # repeated records are read in the same update as their first record or in a later one
+    rng = np.random.default_rng(seed)
+    files = [os.path.relpath(name, repeated_plant) for name in
+             glob.glob(os.path.join(repeated_plant, '*', TIMEFRAME, '*.csv'))]
+    lines = {name: open(os.path.join(repeated_plant, name), 'rb').read().splitlines(keepends=True) for name in files}
+    written = dict.fromkeys(files, 0)
+    root, state_file = str(tmp_path / 'plant'), str(tmp_path / 'state.json')
+    for name in files:
+        os.makedirs(os.path.dirname(os.path.join(root, name)), exist_ok=True)
+
+    while any(written[name] < len(lines[name]) for name in files):
+        for name in files:
+            written[name] = min(len(lines[name]), written[name] + int(rng.integers(3, 400)))
+            partial = lines[name][written[name]][:8] if written[name] < len(lines[name]) else b''
+            with open(os.path.join(root, name), 'wb') as f:
+                f.write(b''.join(lines[name][:written[name]]) + partial)
+        report = IncrementalAvailability(state_file, TIMEFRAME, root_path=root).update()
+
+    assert (report['month_avail_scb'], report['month_avail_inv'], report['irr_gain']) == full_kpis(repeated_plant)
+
+
+def test_state_file_of_another_timeframe_or_project(repeated_plant, tmp_path):
+    state_file = str(tmp_path / 'state.json')
+    IncrementalAvailability(state_file, TIMEFRAME, root_path=repeated_plant).update()
+
+    with pytest.raises(ValueError, match='timeframe'):
+        IncrementalAvailability(state_file, '2020_11', root_path=repeated_plant)
+    with pytest.raises(ValueError, match='timeframe'):
+        IncrementalAvailability(state_file, TIMEFRAME, root_path=str(tmp_path))
+    IncrementalAvailability(state_file, TIMEFRAME, root_path=os.path.join(repeated_plant, '.'))
+
+
+def test_new_records_of_files_with_half_written_header(repeated_plant, tmp_path):
+    # The file is read while it is written, first with part of its header; no header line is read as a record
+    source = sorted(glob.glob(os.path.join(repeated_plant, 'INV_Data', TIMEFRAME, '*.csv')))[0]
+    with open(source, 'rb') as f:
+        data = f.read()
+    col_names = ['Date'] + ['INV {}'.format(i) for i in range(1, data.split(b'\n')[1].count(b';') + 1)]
+    expected = parse_records(source, col_names)
+    file_name = str(tmp_path / 'export.csv')
+    for size in range(0, data.index(b'\n', data.index(b'[kW]')) + 40, 7):
+        with open(file_name, 'wb') as f:
+            f.write(data[:size])
+        df, offset = read_new_records(file_name, 0, col_names)
+        with open(file_name, 'wb') as f:
+            f.write(data)
+        rest, offset = read_new_records(file_name, offset, col_names)
+
+        pd.testing.assert_frame_equal(pd.concat([df, rest]), expected, check_index_type=False)
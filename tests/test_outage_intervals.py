@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the communication-outage masks of Common.Outage_Intervals against a brute-force mask built ticket by ticket.
+"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.Outage_Intervals import (as_tickets, interval_mask, merge_intervals, outage_mask, parse_ticket_dates,
+                                     read_outage_tickets, tickets_from_elements)
+
+INDEX = pd.date_range('2020-10-01', '2020-10-31 23:59', freq='min', name='Date')
+
+
+def brute_force_mask(index, tickets, n_inv):
+    # Every ticket marks the timestamps between its start and its end, both included, of its inverter
+    mask = np.zeros((len(index), n_inv), dtype=bool)
+    for element, start, end in tickets.itertuples(index=False):
+        words = element.split()
+        inv = int(words[1].split('-')[0]) if words[0] == 'SCB' else int(words[-1])
+        if 1 <= inv <= n_inv:
+            mask[:, inv - 1] |= (index >= start) & (index <= end)
+
+    return mask
+
+
+def random_tickets(n_tickets, n_inv, seed):
+    # Tickets of string boxes and inverters, a few of them of inverters that do not exist; the starts and ends fall
+    # on the timestamps, between them and before and after the index, and many tickets overlap
+    rng = np.random.default_rng(seed)
+    inv = rng.integers(1, n_inv + 3, n_tickets)
+    kind = rng.integers(0, 3, n_tickets)
+    elements = np.where(kind == 0, ['SCB {}-{:02d}'.format(i, j) for i, j in zip(inv, rng.integers(1, 25, n_tickets))],
+                        np.where(kind == 1, ['INV {}'.format(i) for i in inv], inv.astype(str)))
+    starts = INDEX[0] + pd.to_timedelta(rng.integers(-2 * 1440, 32 * 1440, n_tickets), unit='min')
+    starts += pd.to_timedelta(np.where(rng.random(n_tickets) < 0.3, rng.integers(1, 60, n_tickets), 0), unit='s')
+    ends = starts + pd.to_timedelta(rng.integers(0, 3 * 1440, n_tickets), unit='min')
+
+    return pd.DataFrame({'element': elements, 'start': starts, 'end': ends})
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_outage_mask_matches_brute_force(seed):
+    tickets = random_tickets(3000, 20, seed)
+
+    np.testing.assert_array_equal(outage_mask(INDEX, tickets, 20), brute_force_mask(INDEX, tickets, 20))
+
+
+def test_outage_mask_of_ticket_dictionary():
+    tickets = {'SCB 2-03': [('2020-10-05 08:00', '2020-10-05 12:00'), ('2020-10-05 11:00', '2020-10-06 00:00')],
+               'INV 4': [('05/10/2020 08:00', '20/10/2020 08:00')], '1': [('2020-10-31 23:59', '2020-11-02')]}
+    expected = pd.DataFrame([(element, pd.Timestamp(start), pd.Timestamp(end)) for element, start, end in
+                             [('SCB 2-03', '2020-10-05 08:00', '2020-10-06 00:00'),
+                              ('INV 4', '2020-10-05 08:00', '2020-10-20 08:00'),
+                              ('1', '2020-10-31 23:59', '2020-11-02')]], columns=['element', 'start', 'end'])
+
+    np.testing.assert_array_equal(outage_mask(INDEX, tickets, 5), brute_force_mask(INDEX, expected, 5))
+
+
+def test_outage_mask_without_tickets():
+    assert not outage_mask(INDEX, None, 4).any()
+    assert outage_mask(INDEX, {}, 4).shape == (len(INDEX), 4)
+
+
+def test_merge_intervals_unions_overlapping_nested_and_touching_intervals():
+    starts = pd.to_datetime(['2020-10-10 00:00', '2020-10-01 00:00', '2020-10-01 06:00', '2020-10-02 00:00',
+                             '2020-10-02 12:00', '2020-10-05 00:00', '2020-10-10 12:00'])
+    ends = pd.to_datetime(['2020-10-11 00:00', '2020-10-01 12:00', '2020-10-01 08:00', '2020-10-02 12:00',
+                           '2020-10-03 00:00', '2020-10-05 00:00', '2020-10-11 06:00'])
+
+    merged_starts, merged_ends = merge_intervals(starts, ends)
+
+    # The nested interval disappears, the intervals that share an end are joined, the interval of a single instant
+    # is kept and the interval starting before the end of the previous one extends it
+    np.testing.assert_array_equal(merged_starts, pd.to_datetime(['2020-10-01 00:00', '2020-10-02 00:00',
+                                                                 '2020-10-05 00:00', '2020-10-10 00:00']).to_numpy())
+    np.testing.assert_array_equal(merged_ends, pd.to_datetime(['2020-10-01 12:00', '2020-10-03 00:00',
+                                                               '2020-10-05 00:00', '2020-10-11 06:00']).to_numpy())
+
+
+def test_merge_intervals_of_random_intervals_covers_their_union():
+    rng = np.random.default_rng(3)
+    starts = INDEX[rng.integers(0, len(INDEX), 5000)]
+    ends = starts + pd.to_timedelta(rng.integers(0, 600, 5000), unit='min')
+
+    merged_starts, merged_ends = merge_intervals(starts, ends)
+
+    assert (merged_starts[1:] > merged_ends[:-1]).all() and (merged_starts <= merged_ends).all()
+    expected = np.zeros(len(INDEX), dtype=bool)
+    for start, end in zip(starts, ends):
+        expected |= (INDEX >= start) & (INDEX <= end)
+    np.testing.assert_array_equal(interval_mask(INDEX, merged_starts, merged_ends), expected)
+
+
+def test_interval_mask_includes_both_ends():
+    index = pd.date_range('2020-10-01', periods=10, freq='15min')
+    starts, ends = merge_intervals([index[2], index[7], index[9] + pd.Timedelta('1min')],
+                                   [index[4], index[7], index[9] + pd.Timedelta('1h')])
+
+    # A ticket from the third to the fifth timestamp covers both of them, a ticket starting and ending on the same
+    # timestamp covers it and a ticket starting after the last timestamp covers nothing
+    np.testing.assert_array_equal(interval_mask(index, starts, ends),
+                                  [False, False, True, True, True, False, False, True, False, False])
+
+    # The ends between timestamps only cover the timestamps within the interval
+    starts, ends = merge_intervals([index[0] + pd.Timedelta('1min')], [index[3] - pd.Timedelta('1s')])
+    np.testing.assert_array_equal(interval_mask(index, starts, ends), [False, True, True] + [False] * 7)
+
+
+def test_ticket_dates_are_day_first_or_iso():
+    dates = parse_ticket_dates(pd.Series(['05/10/2020 08:00', '20/10/2020 08:00', '2020-10-05 08:00', '01/10/2020',
+                                          ' 2020-10-06 ', '02/10/2020 12:30:00']))
+
+    assert dates.tolist() == pd.to_datetime(['2020-10-05 08:00', '2020-10-20 08:00', '2020-10-05 08:00',
+                                             '2020-10-01', '2020-10-06', '2020-10-02 12:30'], format='ISO8601').tolist()
+    with pytest.raises(ValueError):
+        parse_ticket_dates(pd.Series(['10/13/2020 08:00']))
+
+
+def test_ticket_dates_keep_datetimes():
+    values = pd.Series([pd.Timestamp('2020-10-05 08:00'), np.datetime64('2020-10-06T01:00'), '07/10/2020 01:00'])
+
+    assert parse_ticket_dates(values).tolist() == [pd.Timestamp('2020-10-05 08:00'), pd.Timestamp('2020-10-06 01:00'),
+                                                   pd.Timestamp('2020-10-07 01:00')]
+    assert parse_ticket_dates(pd.Series(INDEX[:3])).tolist() == INDEX[:3].tolist()
+
+
+def test_same_ticket_text_gives_the_same_dates_in_every_form():
+    # The intervals of scb_no_comm, a dataframe and a dictionary of tickets with the same day first text must give
+    # the same outage window, 5 to 20 October
+    start, end = '05/10/2020 08:00', '20/10/2020 08:00'
+    expected = [pd.Timestamp('2020-10-05 08:00'), pd.Timestamp('2020-10-20 08:00')]
+    forms = [tickets_from_elements(['INV 3'], [(start, end)]),
+             as_tickets(pd.DataFrame({'element': ['INV 3'], 'start': [start], 'end': [end]})),
+             as_tickets({'INV 3': [(start, end)]})]
+
+    for tickets in forms:
+        assert tickets[['start', 'end']].iloc[0].tolist() == expected
+        np.testing.assert_array_equal(outage_mask(INDEX, tickets, 4), outage_mask(INDEX, forms[-1], 4))
+    with pytest.raises(ValueError):
+        tickets_from_elements(['INV 3'], [('10/13/2020 08:00', end)])
+
+
+def test_intervals_of_elements_without_dates_cover_all_the_time():
+    tickets = tickets_from_elements(['SCB 1-02', 'INV 2'], [])
+
+    assert outage_mask(INDEX, tickets, 3)[:, :2].all() and not outage_mask(INDEX, tickets, 3)[:, 2].any()
+
+
+def test_read_outage_tickets_with_dates_of_the_scada_exports(tmp_path):
+    file_name = tmp_path / 'tickets.csv'
+    file_name.write_text('Element, Start, End\nINV 3, 05/10/2020 08:00, 20/10/2020 08:00\n'
+                         'SCB 2-01, 2020-10-05 08:00, 2020-10-06\n')
+
+    tickets = read_outage_tickets(str(file_name))
+
+    assert tickets['element'].tolist() == ['INV 3', 'SCB 2-01']
+    assert tickets['start'].tolist() == [pd.Timestamp('2020-10-05 08:00')] * 2
+    assert tickets['end'].tolist() == [pd.Timestamp('2020-10-20 08:00'), pd.Timestamp('2020-10-06')]
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the cache of compiled topologies of Common.Plant_Topology.
+"""
+import json
+from conftest import TIMEFRAME
+from Benchmarks.synthetic_scada import generate_plant
+from Common import Plant_Topology
+from Common.Plant_Topology import load_topology
+
+
+def test_compiled_topologies_are_reused_and_bounded(tmp_path, monkeypatch):
+    root = str(tmp_path / 'plant')
+    generate_plant(root, TIMEFRAME, n_inv=2, scb_per_inv=3, days=1)
+    monkeypatch.setattr(Plant_Topology, 'MAX_COMPILED', 3)
+    monkeypatch.setattr(Plant_Topology, 'COMPILED', type(Plant_Topology.COMPILED)())
+
+    assert load_topology(root, TIMEFRAME) is load_topology(root, TIMEFRAME)
+
+    # Every configuration file is a different topology of the same plant-month; only the last 3 are kept
+    topologies = []
+    for threshold in range(10):
+        config_file = str(tmp_path / 'topology {}.json'.format(threshold))
+        with open(config_file, 'w') as f:
+            json.dump({'scb_threshold': threshold}, f)
+        topologies.append(load_topology(root, TIMEFRAME, config_file))
+        assert len(Plant_Topology.COMPILED) <= 3
+
+    assert [topology.scb_threshold for topology in topologies] == list(range(10))
+    assert load_topology(root, TIMEFRAME, str(tmp_path / 'topology 9.json')) is topologies[-1]
+    assert load_topology(root, TIMEFRAME, str(tmp_path / 'topology 0.json')) is not topologies[0]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the chunked availability of Availability_Streaming against a full calculation.
+"""
+import pytest
+from conftest import TIMEFRAME
+from Availability_Calc import Availability
+from Availability_Streaming import stream_availability
+
+NO_COMM = {'scb_no_comm': ['SCB 1-02', 'INV 3'], 'interv_no_comm': [('2020-10-10 06:00', '2020-10-25 02:30')]}
+
+
+@pytest.mark.parametrize('chunk_rows', [38, 773, 50000])
+@pytest.mark.parametrize('no_comm', [{}, NO_COMM])
+def test_chunks_with_repeated_timestamps_equal_full_calculation(repeated_plant, chunk_rows, no_comm):
+    # With 38 and 773 records per chunk, a chunk ends in the middle of the repeated hour, so some repeated records
+    # come in a later chunk than their first record; the KPIs must be exactly those of the full calculation, which
+    # keeps the first record of every timestamp
+    calc = Availability('Test', TIMEFRAME, root_path=repeated_plant)
+    calc.availability_calc(report=False, **no_comm)
+
+    kpis = stream_availability(TIMEFRAME, repeated_plant, chunk_rows=chunk_rows, **no_comm)[:3]
+
+    assert kpis == (calc.month_avail_scb, calc.month_avail_inv, calc.irr_gain)